@@ -0,0 +1,10 @@
+-- Add confirmation timestamps to an existing resumes table
+-- Run this script if your resumes table has no confirmed_at column
+
+-- Set by /confirm-role; incremental retraining reads rows confirmed after the model's watermark
+ALTER TABLE resumes ADD COLUMN IF NOT EXISTS confirmed_at TIMESTAMP;
+
+CREATE INDEX IF NOT EXISTS resumes_confirmed_at_idx ON resumes (confirmed_at) WHERE confirmed_role IS NOT NULL;
+
+-- Verify the column was added
+SELECT COUNT(*) AS confirmed_with_timestamp FROM resumes WHERE confirmed_at IS NOT NULL;
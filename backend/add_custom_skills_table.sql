@@ -0,0 +1,14 @@
+-- Add custom skills table to existing database
+-- Run this script if you have an existing database without the custom_skills table
+
+-- Create custom skills table (loaded into the skill extractor at startup and polled by every worker)
+CREATE TABLE IF NOT EXISTS custom_skills (
+  id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+  skill TEXT NOT NULL,
+  category VARCHAR(255) NOT NULL DEFAULT 'custom',
+  created_at TIMESTAMP DEFAULT now(),
+  UNIQUE (skill, category)
+);
+
+-- Verify the table was created
+SELECT COUNT(*) as total_custom_skills FROM custom_skills;
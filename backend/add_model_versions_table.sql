@@ -0,0 +1,17 @@
+-- Add model versions table to existing database
+-- Run this script if you have an existing database without the model_versions table
+
+-- Create model versions table (the active row is the model every worker serves)
+CREATE TABLE IF NOT EXISTS model_versions (
+  version TEXT PRIMARY KEY,
+  is_active BOOLEAN NOT NULL DEFAULT FALSE,
+  metadata JSONB,
+  created_at TIMESTAMP DEFAULT now(),
+  activated_at TIMESTAMP
+);
+
+-- At most one active version; also serves the workers' polling query
+CREATE UNIQUE INDEX IF NOT EXISTS model_versions_active_idx ON model_versions (is_active) WHERE is_active;
+
+-- Verify the table was created
+SELECT COUNT(*) as total_model_versions FROM model_versions;
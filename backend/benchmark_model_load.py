@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Benchmark model load time: pickled (clf, mlb) versus compact mapped arrays
+Measures what a worker pays on cold start or reload before its first prediction
+"""
+
+import argparse
+import json
+import platform
+import statistics
+import tempfile
+import time
+from datetime import datetime
+from typing import Callable, Dict
+
+import joblib
+
+from export_model import directory_size, export_model, resolve_model_path
+from linear_scorer import compile_scorer
+from model_artifacts import load_scorer
+from model_registry import REGISTRY_DIR
+
+SAMPLE_SKILLS = ["Python", "Django", "PostgreSQL", "Docker", "AWS"]
+
+
+def time_load(load: Callable[[], object], repeat: int) -> Dict[str, float]:
+    """Load + first prediction timings in milliseconds"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        scorer = load()
+        scorer.predict_proba([SAMPLE_SKILLS])
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return {"mean": statistics.mean(timings), "p50": timings[len(timings) // 2], "max": timings[-1]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark pickled vs compact model loading")
+    parser.add_argument("--version", help="registry version to load (default: active, or legacy model.pkl)")
+    parser.add_argument("--registry", default=REGISTRY_DIR)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--output", default="benchmark_model_load.json")
+    args = parser.parse_args()
+
+    print("⏱️  Model Load Benchmark")
+    print("=" * 60)
+
+    model_path = resolve_model_path(args.version, args.registry)
+    with tempfile.TemporaryDirectory() as compact_dir:
+        report = export_model(model_path, output_dir=compact_dir)
+
+        def load_pickle():
+            model, mlb = joblib.load(model_path)
+            return compile_scorer(model, mlb)
+
+        results = {
+            "timestamp": datetime.utcnow().isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "source": model_path,
+            "repeat": args.repeat,
+            "features": {"pickle": report["features_before"], "compact": report["features_after"]},
+            "bytes": {"pickle": report["pickle_bytes"], "compact": directory_size(compact_dir)},
+            "load_ms": {
+                "pickle": time_load(load_pickle, args.repeat),
+                "compact": time_load(lambda: load_scorer(compact_dir), args.repeat),
+            },
+        }
+
+    for name in ("pickle", "compact"):
+        timing = results["load_ms"][name]
+        print(f"📦 {name:<8} {results['bytes'][name]:>10,} bytes | {results['features'][name]:>6} features | "
+              f"load+predict p50 {timing['p50']:.2f} ms, mean {timing['mean']:.2f} ms")
+    speedup = results["load_ms"]["pickle"]["p50"] / results["load_ms"]["compact"]["p50"]
+    print(f"🚀 Compact load is {speedup:.1f}x faster")
+
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\n💾 Results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
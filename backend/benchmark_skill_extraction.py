@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Benchmark harness for SkillExtractor throughput
+Generates deterministic resume corpora from the seed data skill sets and reports
+resumes/sec, latency percentiles and time spent in each internal method
+"""
+
+import argparse
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+from datetime import datetime
+from functools import wraps
+from typing import Dict, List
+
+from seed_data import SKILL_SETS, RESUME_TEMPLATES
+from skill_extractor import SkillExtractor
+
+# Internal methods timed in the instrumented pass
+TIMED_METHODS = [
+    "_find_direct_matches",
+    "_find_fuzzy_matches",
+    "_find_pattern_matches",
+    "_find_context_matches",
+    "_clean_and_normalize_skills",
+    "_calculate_skill_frequency",
+    "_find_sections",
+]
+
+# Paragraphs per resume; "long" is roughly a 20-page resume (~10k words)
+CORPUS_SIZES = {
+    "short": 1,
+    "medium": 15,
+    "long": 350,
+}
+
+SECTION_TITLES = ["Summary", "Skills", "Experience", "Projects", "Education"]
+
+def generate_resume(rng: random.Random, paragraphs: int) -> str:
+    """Build one synthetic resume from the seed templates"""
+    role = rng.choice(list(SKILL_SETS))
+    lines = [f"{role} Resume"]
+    for i in range(paragraphs):
+        if i % 5 == 0:
+            lines.append(SECTION_TITLES[(i // 5) % len(SECTION_TITLES)])
+        skills = rng.sample(SKILL_SETS[role], min(3, len(SKILL_SETS[role])))
+        template = rng.choice(RESUME_TEMPLATES)
+        lines.append(template.format(role=role, years=rng.randint(1, 8), skills=", ".join(skills)))
+    return "\n".join(lines)
+
+def generate_corpus(size: str, count: int, seed: int) -> List[str]:
+    """Deterministic corpus of `count` resumes of the given size"""
+    rng = random.Random(f"{seed}-{size}")
+    return [generate_resume(rng, CORPUS_SIZES[size]) for _ in range(count)]
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[rank]
+
+def instrument(extractor: SkillExtractor) -> Dict[str, float]:
+    """Wrap the extractor's internal methods so each call adds to a timer"""
+    totals = {name: 0.0 for name in TIMED_METHODS}
+
+    for name in TIMED_METHODS:
+        method = getattr(extractor, name)
+
+        def timed(*args, _method=method, _name=name, **kwargs):
+            start = time.perf_counter()
+            try:
+                return _method(*args, **kwargs)
+            finally:
+                totals[_name] += time.perf_counter() - start
+
+        setattr(extractor, name, wraps(method)(timed))
+    return totals
+
+def benchmark_corpus(texts: List[str], fuzzy: bool) -> Dict:
+    """Time a corpus end to end, then again with per-method instrumentation"""
+    # Cache disabled (zero budget) so every call does the full extraction
+    extractor = SkillExtractor(cache_max_bytes=0, fuzzy=fuzzy)
+    extractor.extract_skills(texts[0])  # warm up lazily built indexes
+
+    latencies = []
+    started = time.perf_counter()
+    for text in texts:
+        start = time.perf_counter()
+        extractor.extract_skills(text)
+        latencies.append(time.perf_counter() - start)
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+
+    instrumented = SkillExtractor(cache_max_bytes=0, fuzzy=fuzzy)
+    instrumented.extract_skills(texts[0])
+    totals = instrument(instrumented)
+    instrumented_started = time.perf_counter()
+    for text in texts:
+        instrumented.extract_skills(text)
+    instrumented_elapsed = time.perf_counter() - instrumented_started
+
+    return {
+        "resumes": len(texts),
+        "avg_chars": round(statistics.mean(len(text) for text in texts)),
+        "total_seconds": elapsed,
+        "resumes_per_sec": len(texts) / elapsed if elapsed else 0.0,
+        "latency_ms": {
+            "mean": statistics.mean(latencies) * 1000,
+            "p50": percentile(latencies, 50) * 1000,
+            "p99": percentile(latencies, 99) * 1000,
+            "max": latencies[-1] * 1000,
+        },
+        "methods_ms_per_resume": {
+            name: total / len(texts) * 1000 for name, total in totals.items() if total
+        },
+        "methods_share": {
+            name: total / instrumented_elapsed for name, total in totals.items() if total
+        },
+    }
+
+def compare(results: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """Corpora whose throughput dropped more than `tolerance` versus the baseline"""
+    regressions = []
+    for size, current in results["corpora"].items():
+        previous = baseline.get("corpora", {}).get(size)
+        if not previous:
+            continue
+        ratio = current["resumes_per_sec"] / previous["resumes_per_sec"]
+        if ratio < 1 - tolerance:
+            regressions.append(f"{size}: {previous['resumes_per_sec']:.1f} -> {current['resumes_per_sec']:.1f} resumes/sec ({ratio:.0%})")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark SkillExtractor throughput")
+    parser.add_argument("--count", type=int, default=200, help="resumes per corpus (long corpus uses a tenth)")
+    parser.add_argument("--sizes", nargs="+", default=list(CORPUS_SIZES), choices=list(CORPUS_SIZES))
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--fuzzy", action="store_true", help="enable fuzzy matching")
+    parser.add_argument("--output", default="benchmark_skill_extraction.json")
+    parser.add_argument("--compare", help="baseline JSON from an earlier run")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="allowed throughput drop vs baseline")
+    args = parser.parse_args()
+
+    print("⏱️  SkillExtractor Benchmark")
+    print("=" * 60)
+
+    results = {
+        "timestamp": datetime.utcnow().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "seed": args.seed,
+        "fuzzy": args.fuzzy,
+        "dictionary_size": len(SkillExtractor(cache_max_bytes=0).all_skills),
+        "corpora": {},
+    }
+
+    for size in args.sizes:
+        count = max(1, args.count // 10) if size == "long" else args.count
+        texts = generate_corpus(size, count, args.seed)
+        stats = benchmark_corpus(texts, args.fuzzy)
+        results["corpora"][size] = stats
+
+        print(f"\n📄 {size}: {stats['resumes']} resumes, ~{stats['avg_chars']} chars each")
+        print(f"   {stats['resumes_per_sec']:.1f} resumes/sec | "
+              f"p50 {stats['latency_ms']['p50']:.2f} ms | p99 {stats['latency_ms']['p99']:.2f} ms")
+        for name, share in sorted(stats["methods_share"].items(), key=lambda item: -item[1]):
+            print(f"   {name:<30} {stats['methods_ms_per_resume'][name]:8.3f} ms  ({share:.0%})")
+
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\n💾 Results saved to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print("\n🚨 Throughput regressions:")
+            for regression in regressions:
+                print(f"   {regression}")
+            sys.exit(1)
+        print("\n✅ No throughput regressions against baseline")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Export a trained model as a compact, arrays-only registry version
+Drops placeholder and zero-weight features, stores float32 weights and
+interns skills to integer IDs (see model_artifacts.py for the layout)
+
+Published versions are activated through the database like a trained model
+(see model_sync.py), so every worker follows them. Exported versions hold no
+pickled sklearn model, so an incremental retrain started from one falls back
+to a full re-fit.
+"""
+
+import argparse
+import os
+import random
+from typing import Any, Dict, Optional
+
+import joblib
+import numpy as np
+
+from linear_scorer import LinearScorer
+from model_artifacts import PLACEHOLDER_SKILLS, prune_scorer, save_scorer
+from model_registry import (
+    LEGACY_MODEL_PATH, LEGACY_VERSION, MODEL_FILE, REGISTRY_DIR, active_version, publish_scorer,
+)
+from model_sync import acquire_training_lock, activate_published_version
+
+
+def directory_size(path: str) -> int:
+    """Total size in bytes of the files in a directory"""
+    return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+
+
+def max_probability_change(original: LinearScorer, compact: LinearScorer, samples: int = 500, seed: int = 42) -> float:
+    """Largest probability difference between the two scorers over random skill sets"""
+    rng = random.Random(seed)
+    skills = [skill for skill in original.vocabulary if skill not in PLACEHOLDER_SKILLS]
+    if not skills:
+        return 0.0
+    skill_lists = [rng.sample(skills, min(len(skills), rng.randint(1, 15))) for _ in range(samples)]
+    return float(np.abs(original.predict_proba(skill_lists) - compact.predict_proba(skill_lists)).max())
+
+
+def export_model(model_path: str, output_dir: Optional[str] = None, registry_dir: str = REGISTRY_DIR,
+                 tolerance: float = 0.0, conn=None) -> Dict[str, Any]:
+    """
+    Compact a pickled (clf, mlb) model
+
+    Writes the arrays to output_dir, or publishes them as a new registry
+    version when no output_dir is given. The version is activated
+    cluster-wide through conn (holding the training lock); without conn it is
+    published inactive. Returns a size/accuracy report.
+    """
+    model, mlb = joblib.load(model_path)
+    if not hasattr(model, "coef_"):
+        raise ValueError(f"{type(model).__name__} is not a linear model and cannot be exported")
+
+    original = LinearScorer.from_sklearn(model, mlb)
+    compact = prune_scorer(original, tolerance=tolerance)
+    report = {
+        "source": model_path,
+        "features_before": original.n_features,
+        "features_after": compact.n_features,
+        "dropped_placeholders": sorted(skill for skill in PLACEHOLDER_SKILLS if skill in original.vocabulary),
+        "pickle_bytes": os.path.getsize(model_path),
+        "max_probability_change": max_probability_change(original, compact),
+    }
+
+    metadata = {"trainer": "export_model", "exported_from": model_path, "tolerance": tolerance}
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+        save_scorer(compact, output_dir)
+        report["output"] = output_dir
+    else:
+        version = publish_scorer(compact, metadata, registry_dir, activate=False)
+        if conn is not None:
+            activate_published_version(conn, version, metadata, registry_dir)
+        report["version"] = version
+        report["activated"] = conn is not None
+        output_dir = os.path.join(registry_dir, version)
+    report["artifact_bytes"] = directory_size(output_dir)
+    return report
+
+
+def resolve_model_path(version: Optional[str], registry_dir: str) -> str:
+    """Pickle of the given version, defaulting to the active one (or the legacy model.pkl)"""
+    version = version or active_version(registry_dir) or LEGACY_VERSION
+    if version == LEGACY_VERSION:
+        return LEGACY_MODEL_PATH
+    return os.path.join(registry_dir, version, MODEL_FILE)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export a compact, memory-mappable model artifact")
+    parser.add_argument("--version", help="registry version to export (default: active, or legacy model.pkl)")
+    parser.add_argument("--registry", default=REGISTRY_DIR)
+    parser.add_argument("--output", help="write arrays to this directory instead of publishing a version")
+    parser.add_argument("--tolerance", type=float, default=0.0,
+                        help="also drop features whose weights are all within this of zero")
+    parser.add_argument("--no-activate", action="store_true", help="publish without making the version active")
+    args = parser.parse_args()
+
+    print("🗜️  Model Export")
+    print("=" * 60)
+    conn = None
+    if not args.output and not args.no_activate:
+        # Only activation needs the database, so --output works without one
+        import psycopg2
+        from train_model import DATABASE_URL
+        conn = psycopg2.connect(DATABASE_URL)
+        # Never activate concurrently with a running retrain
+        acquire_training_lock(conn)
+    try:
+        report = export_model(
+            resolve_model_path(args.version, args.registry),
+            output_dir=args.output,
+            registry_dir=args.registry,
+            tolerance=args.tolerance,
+            conn=conn,
+        )
+    finally:
+        if conn is not None:
+            conn.close()
+    print(f"📄 Source: {report['source']}")
+    print(f"🔢 Features: {report['features_before']} -> {report['features_after']}"
+          f" (placeholders dropped: {report['dropped_placeholders'] or 'none'})")
+    print(f"💾 Size: {report['pickle_bytes']:,} bytes pickled -> {report['artifact_bytes']:,} bytes of arrays")
+    print(f"🎯 Max probability change: {report['max_probability_change']:.2e}")
+    if "version" in report:
+        print(f"📦 Published as version {report['version']}"
+              f"{' and activated cluster-wide' if report['activated'] else ' (not activated)'}")
+    else:
+        print(f"📁 Written to {report['output']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+"""
+On-disk cache of the vectorized training set
+Keeps the confirmed-resume skill matrix, labels and row IDs in one compressed
+.npz, so retraining only reads rows confirmed since the cached watermark
+instead of scanning the whole table
+"""
+
+import hashlib
+import json
+import os
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import numpy as np
+from scipy import sparse
+
+from training_data import CONFIRMED_RESUMES_QUERY, TrainingSet, database_time, load_training_set
+
+CACHE_DIR = os.getenv("TRAINING_CACHE_DIR", os.path.join(os.path.dirname(__file__), "training_cache"))
+CACHE_FILE = "training_set.npz"
+
+# Bump when the stored layout changes; older caches are then rebuilt
+CACHE_FORMAT = 2
+
+# Set TRAINING_CACHE=0 to always read the full table
+CACHE_ENABLED = os.getenv("TRAINING_CACHE", "1") != "0"
+
+# Edits that do not bump confirmed_at (e.g. manual SQL) are only picked up by
+# a full rebuild, so the cache is rebuilt from scratch at least this often
+CACHE_MAX_AGE_DAYS = float(os.getenv("TRAINING_CACHE_MAX_AGE_DAYS", "7"))
+
+# Same rows as CONFIRMED_RESUMES_QUERY, with the resume ID to match re-confirmations
+CONFIRMED_ROWS_QUERY = CONFIRMED_RESUMES_QUERY.replace("SELECT ", "SELECT id, ", 1)
+
+# Count and ID fingerprint (see id_fingerprint) of the rows a complete
+# training set must contain; rows without skills are skipped
+TRAINABLE_FINGERPRINT_QUERY = """
+    SELECT count(*), COALESCE(sum(('x' || substr(md5(id::text), 1, 15))::bit(60)::bigint), 0)
+    FROM resumes
+    WHERE confirmed_role IS NOT NULL AND cardinality(extracted_skills) > 0
+"""
+
+
+def id_fingerprint(ids) -> int:
+    """Sum of the first 60 bits of each row ID's MD5, as TRAINABLE_FINGERPRINT_QUERY computes it"""
+    return sum(int(hashlib.md5(str(row_id).encode("utf-8")).hexdigest()[:15], 16) for row_id in ids)
+
+
+def save_training_set(data: TrainingSet, watermark: str, directory: str = CACHE_DIR,
+                      built_at: Optional[str] = None):
+    """
+    Write a training set (with row IDs) and its watermark, replacing the cache atomically
+
+    built_at is when the cached rows were last read in full (default: now).
+    """
+    if data.ids is None:
+        raise ValueError("Only training sets loaded with row IDs can be cached")
+    os.makedirs(directory, exist_ok=True)
+    metadata = {
+        "format": CACHE_FORMAT,
+        "watermark": watermark,
+        "built_at": built_at or datetime.utcnow().isoformat(),
+        "n_samples": data.n_samples,
+        "n_features": data.n_features,
+    }
+    X = data.X.tocsr()
+    path = os.path.join(directory, CACHE_FILE)
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    # Strings are stored as fixed-width unicode so loading never needs pickle
+    with open(tmp_path, "wb") as f:
+        np.savez_compressed(
+            f,
+            data=X.data.astype(np.int8),
+            indices=X.indices,
+            indptr=X.indptr,
+            labels=np.asarray(data.y, dtype=str),
+            skills=np.asarray(data.skills, dtype=str),
+            ids=np.asarray(data.ids, dtype=str),
+            metadata=np.array(json.dumps(metadata)),
+        )
+    os.replace(tmp_path, path)
+
+
+def load_cached_training_set(directory: str = CACHE_DIR) -> Optional[Tuple[TrainingSet, Dict[str, Any]]]:
+    """(TrainingSet, metadata) from the cache, or None if it is missing, outdated or unreadable"""
+    path = os.path.join(directory, CACHE_FILE)
+    if not os.path.exists(path):
+        return None
+    try:
+        with np.load(path, allow_pickle=False) as arrays:
+            metadata: Dict[str, Any] = json.loads(str(arrays["metadata"]))
+            if metadata.get("format") != CACHE_FORMAT:
+                print(f"⚠️ Training cache format {metadata.get('format')} is outdated, rebuilding")
+                return None
+            skills = arrays["skills"].astype(object)
+            X = sparse.csr_matrix(
+                (arrays["data"].astype(np.float64), arrays["indices"], arrays["indptr"]),
+                shape=(len(arrays["indptr"]) - 1, len(skills)),
+            )
+            data = TrainingSet(X, arrays["labels"].astype(object), skills, ids=arrays["ids"].astype(object))
+    except Exception as e:
+        print(f"⚠️ Could not read training cache {path}: {e}")
+        return None
+    if data.n_samples != metadata.get("n_samples"):
+        print("⚠️ Training cache is inconsistent, rebuilding")
+        return None
+    return data, metadata
+
+
+def merge_training_sets(cached: TrainingSet, delta: TrainingSet) -> TrainingSet:
+    """
+    Append newly read rows to a cached training set
+
+    Both matrices are re-laid out on the union vocabulary, so new skills just
+    add columns. Cached rows whose IDs reappear in the delta (re-confirmed
+    resumes) are replaced by their new version.
+    """
+    skills = np.union1d(cached.skills.astype(str), delta.skills.astype(str)).astype(object)
+    same_vocabulary = len(skills) == len(cached.skills)
+    X_cached = cached.X if same_vocabulary else cached.reindex(skills)
+    X_delta = delta.reindex(skills)
+
+    keep = ~np.isin(cached.ids.astype(str), delta.ids.astype(str))
+    X = sparse.vstack([X_cached[keep], X_delta], format="csr")
+    return TrainingSet(
+        X,
+        np.concatenate([cached.y[keep], delta.y]),
+        skills,
+        delta.skipped,
+        np.concatenate([cached.ids[keep], delta.ids]),
+    )
+
+
+def load_training_set_cached(conn, directory: str = CACHE_DIR,
+                             on_chunk: Optional[Callable[[int], None]] = None,
+                             max_age_days: float = CACHE_MAX_AGE_DAYS) -> Tuple[TrainingSet, str]:
+    """
+    Training set of every confirmed resume, reading only what the cache lacks
+
+    Returns (training set, watermark). Falls back to a full table scan when
+    there is no usable cache, when the cache is older than max_age_days, or
+    when the merged rows are not exactly the trainable rows of the table
+    (e.g. resumes were deleted or cleared since caching).
+    """
+    watermark = database_time(conn)
+    cached = load_cached_training_set(directory)
+    if cached is not None:
+        age_days = (datetime.utcnow() - datetime.fromisoformat(cached[1]["built_at"])).total_seconds() / 86400
+        if age_days > max_age_days:
+            print(f"🗃️ Training cache is {age_days:.1f} days old, rebuilding")
+            cached = None
+    data = None
+    built_at = None
+    if cached is not None:
+        cached_data, metadata = cached
+        delta = load_training_set(
+            conn, CONFIRMED_ROWS_QUERY + " AND confirmed_at > %(watermark)s",
+            {"watermark": metadata["watermark"]}, on_chunk=on_chunk, with_ids=True,
+        )
+        data = merge_training_sets(cached_data, delta)
+        with conn.cursor() as cur:
+            cur.execute(TRAINABLE_FINGERPRINT_QUERY)
+            expected_rows, expected_fingerprint = cur.fetchone()
+        if data.n_samples == expected_rows and id_fingerprint(data.ids) == int(expected_fingerprint):
+            print(f"🗃️ Training cache hit: {cached_data.n_samples} cached + {delta.n_samples} new rows")
+            built_at = metadata["built_at"]
+        else:
+            print(f"⚠️ Training cache rows ({data.n_samples}) do not match the {expected_rows} trainable rows, rebuilding")
+            data = None
+
+    if data is None:
+        data = load_training_set(conn, CONFIRMED_ROWS_QUERY, on_chunk=on_chunk, with_ids=True)
+    try:
+        save_training_set(data, watermark, directory, built_at)
+    except OSError as e:
+        print(f"⚠️ Could not write training cache: {e}")
+    return data, watermark
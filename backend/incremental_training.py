@@ -0,0 +1,120 @@
+"""
+Helpers for continuing training of a published linear model
+Used by retrain_cron's incremental mode to learn from newly confirmed resumes
+"""
+
+import copy
+
+import numpy as np
+from scipy import sparse
+from sklearn.linear_model import LogisticRegression, SGDClassifier
+from sklearn.preprocessing import MultiLabelBinarizer
+
+from linear_scorer import is_multinomial
+
+
+class FullRefitRequired(Exception):
+    """Incremental training cannot continue from the active model"""
+
+
+class IncrementalLogisticRegression(LogisticRegression):
+    """
+    LogisticRegression that can keep learning with partial_fit
+
+    partial_fit takes one SGD step per row on the same loss the full fit
+    minimized (softmax cross-entropy, or per-class logistic loss for
+    one-vs-rest models) plus its L2 penalty, so probabilities are unchanged
+    until an update happens. Steps follow the Pegasos schedule 1 / (alpha * t)
+    with alpha = 1 / (C * n_samples_seen_), starting at t = n_samples_seen_,
+    i.e. as if the full fit had been reached by SGD.
+    """
+
+    @classmethod
+    def from_fitted(cls, clf: LogisticRegression, n_samples_seen: int) -> "IncrementalLogisticRegression":
+        incremental = cls(**clf.get_params())
+        incremental.__dict__.update(copy.deepcopy(clf.__dict__))
+        incremental.n_samples_seen_ = max(int(n_samples_seen), 1)
+        incremental.t_ = float(incremental.n_samples_seen_)
+        return incremental
+
+    def partial_fit(self, X, y):
+        X = sparse.csr_matrix(X, dtype=np.float64)
+        y = np.asarray(y)
+        unknown = set(y) - set(self.classes_)
+        if unknown:
+            raise ValueError(f"partial_fit cannot add classes: {sorted(unknown)}")
+        targets = np.searchsorted(self.classes_, y)
+
+        binary = self.coef_.shape[0] == 1
+        softmax = not binary and is_multinomial(self)
+        alpha = 1.0 / (self.C * self.n_samples_seen_)
+        # coef = scale * weights, so the L2 shrink is O(1) per row
+        weights = np.array(self.coef_, dtype=np.float64)
+        intercept = np.array(self.intercept_, dtype=np.float64)
+        scale = 1.0
+        for row, target in enumerate(targets):
+            columns = X.indices[X.indptr[row]:X.indptr[row + 1]]
+            values = X.data[X.indptr[row]:X.indptr[row + 1]]
+            scores = scale * (weights[:, columns] @ values) + intercept
+            if softmax:
+                probabilities = np.exp(scores - scores.max())
+                probabilities /= probabilities.sum()
+            else:
+                probabilities = 1.0 / (1.0 + np.exp(-scores))
+            if binary:
+                gradient = probabilities - float(target == 1)
+            else:
+                gradient = probabilities
+                gradient[target] -= 1.0
+
+            self.t_ += 1.0
+            eta = 1.0 / (alpha * self.t_)
+            scale *= 1.0 - eta * alpha
+            weights[:, columns] -= (eta / scale) * np.outer(gradient, values)
+            intercept -= eta * gradient
+            if scale < 1e-6:
+                weights *= scale
+                scale = 1.0
+
+        self.coef_ = weights * scale
+        self.intercept_ = intercept
+        self.n_samples_seen_ += len(targets)
+        return self
+
+
+def as_incremental(clf, n_samples_seen):
+    """
+    The model in a form that supports partial_fit
+
+    LogisticRegression (from full re-fits) becomes an IncrementalLogisticRegression
+    with the same weights and loss, so predict_proba is unchanged before any
+    update. SGDClassifiers (from older incremental runs) already support it.
+    Other models (e.g. tree ensembles) raise FullRefitRequired.
+    """
+    if isinstance(clf, (SGDClassifier, IncrementalLogisticRegression)):
+        return clf
+    if not isinstance(clf, LogisticRegression):
+        raise FullRefitRequired(f"{type(clf).__name__} models cannot be trained incrementally")
+    return IncrementalLogisticRegression.from_fitted(clf, n_samples_seen)
+
+def grow_vocabulary(clf, mlb, skill_lists):
+    """
+    Extend the binarizer with unseen skills, widening clf.coef_ to match
+
+    New skills start with zero weight; existing weights move to their skill's
+    position in the (sorted) grown vocabulary.
+    """
+    known = set(mlb.classes_)
+    new_skills = {skill for skills in skill_lists for skill in skills} - known
+    if not new_skills:
+        return mlb
+
+    grown = MultiLabelBinarizer(classes=sorted(known | new_skills))
+    grown.fit([])
+    positions = np.searchsorted(grown.classes_, mlb.classes_)
+    coef = np.zeros((clf.coef_.shape[0], len(grown.classes_)), dtype=np.float64)
+    coef[:, positions] = clf.coef_
+    clf.coef_ = coef
+    clf.n_features_in_ = len(grown.classes_)
+    print(f"🧩 Vocabulary grown by {len(new_skills)} skills to {len(grown.classes_)}")
+    return grown
@@ -0,0 +1,96 @@
+"""
+Micro-batching scheduler for model inference
+Concurrent single-row predictions are queued and scored together in one call
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional
+
+# Seconds a caller waits for its result before giving up
+DEFAULT_TIMEOUT = 5.0
+
+
+class InferenceBatcher:
+    """
+    Queue of pending predictions flushed by one background thread
+
+    A flush happens as soon as max_batch_size items are waiting, or max_wait
+    seconds after the first item of the batch arrived, so a lone request
+    waits at most max_wait before it is scored. predict_batch receives the
+    queued items in order and must return one result per item.
+    """
+
+    def __init__(self, predict_batch: Callable[[List[Any]], List[Any]], max_batch_size: int = 64,
+                 max_wait: float = 0.002):
+        self.predict_batch = predict_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self._queue: "queue.Queue[tuple]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self.batches = 0
+        self.items = 0
+
+    def submit(self, item: Any) -> Future:
+        """Queue one item; the returned future resolves to its result"""
+        self._ensure_started()
+        future: Future = Future()
+        self._queue.put((item, future))
+        return future
+
+    def predict(self, item: Any, timeout: Optional[float] = DEFAULT_TIMEOUT) -> Any:
+        """Queue one item and wait for its result (concurrent.futures.TimeoutError after timeout)"""
+        return self.submit(item).result(timeout)
+
+    def _ensure_started(self):
+        # Started lazily so a forked worker process gets its own thread
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="inference-batcher", daemon=True)
+                self._thread.start()
+
+    def _next_batch(self) -> List[tuple]:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                # Drain whatever is already queued without waiting
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            items = [item for item, _ in batch]
+            try:
+                results = list(self.predict_batch(items))
+                if len(results) != len(items):
+                    # Results can no longer be matched to items; fail the whole batch
+                    raise ValueError(f"predict_batch returned {len(results)} results for {len(items)} items")
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            self.batches += 1
+            self.items += len(items)
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
+
+    def stats(self) -> Dict[str, Any]:
+        """Flush counters and current queue depth"""
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch_size": self.items / self.batches if self.batches else 0.0,
+            "queued": self._queue.qsize(),
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+        }
@@ -0,0 +1,158 @@
+"""
+Pure-NumPy scoring engine for linear role classifiers
+Replaces sklearn's per-call validation with sparse weight gathering + softmax
+"""
+
+from typing import Iterable, List, Mapping, Sequence, Tuple
+
+import numpy as np
+
+
+class LinearScorer:
+    """
+    Compact scorer compiled from a fitted linear classifier and its skill vocabulary
+
+    Inputs are treated exactly like MultiLabelBinarizer rows: every known skill
+    is a binary feature, duplicates count once and unknown skills are ignored.
+    Scores for a row are the intercept plus the weight rows of its active
+    features, so cost depends on the number of skills, not the vocabulary size.
+    """
+
+    def __init__(self, vocabulary: Mapping[str, int], coef: np.ndarray, intercept: np.ndarray,
+                 classes: Sequence[str], multinomial: bool = True):
+        coef = np.asarray(coef)
+        intercept = np.asarray(intercept, dtype=np.float64)
+        if coef.shape[0] == 1:
+            # Binary models store a single row; [0, w] through a softmax is
+            # the same as the sigmoid sklearn applies
+            coef = np.vstack([np.zeros_like(coef), coef])
+            intercept = np.concatenate([[0.0], intercept])
+            multinomial = True
+
+        self.vocabulary = vocabulary
+        # Stored feature-major so one skill's weights for all classes are contiguous
+        self.weights = np.ascontiguousarray(coef.T, dtype=np.float32)
+        self.intercept = intercept
+        self.classes = np.asarray(classes)
+        self.multinomial = multinomial
+
+    @classmethod
+    def from_sklearn(cls, clf, mlb) -> "LinearScorer":
+        """Compile a fitted linear classifier (e.g. LogisticRegression) and its MultiLabelBinarizer"""
+        vocabulary = {skill: index for index, skill in enumerate(mlb.classes_)}
+        return cls(vocabulary, clf.coef_, clf.intercept_, clf.classes_, is_multinomial(clf))
+
+    @classmethod
+    def from_weights(cls, vocabulary: Mapping[str, int], weights: np.ndarray, intercept: np.ndarray,
+                     classes: Sequence[str], multinomial: bool) -> "LinearScorer":
+        """Wrap already feature-major weights (e.g. a memory-mapped array) without copying"""
+        scorer = cls.__new__(cls)
+        scorer.vocabulary = vocabulary
+        scorer.weights = weights
+        scorer.intercept = np.asarray(intercept, dtype=np.float64)
+        scorer.classes = np.asarray(classes)
+        scorer.multinomial = multinomial
+        return scorer
+
+    @property
+    def n_features(self) -> int:
+        return self.weights.shape[0]
+
+    def feature_indices(self, skills: Iterable[str]) -> np.ndarray:
+        """Column indices of the known skills, deduplicated"""
+        vocabulary = self.vocabulary
+        columns = {vocabulary.get(skill) for skill in skills}
+        columns.discard(None)
+        return np.fromiter(columns, dtype=np.int64, count=len(columns))
+
+    def explain(self, skills: Iterable[str], class_index: int,
+                top_n: int = 5) -> Tuple[List[Tuple[str, float]], List[Tuple[str, float]]]:
+        """
+        Skills that pushed a class's score up and down the most
+
+        A skill's contribution is its weight for the class, gathered for all
+        active features at once. Softmax scores are shift-invariant, so for
+        multinomial models the weight is taken relative to the skill's mean
+        weight over all classes. Returns (supporting, opposing), each as
+        (skill, weight) pairs ordered by magnitude.
+        """
+        vocabulary = self.vocabulary
+        active = {}
+        for skill in skills:
+            column = vocabulary.get(skill)
+            if column is not None:
+                active.setdefault(column, skill)
+        if not active:
+            return [], []
+
+        names = list(active.values())
+        weights = self.weights[np.fromiter(active, dtype=np.int64, count=len(active))]
+        contributions = weights[:, class_index]
+        if self.multinomial:
+            contributions = contributions - weights.mean(axis=1)
+        order = np.argsort(contributions, kind="stable")
+        supporting = [(names[i], float(contributions[i])) for i in order[::-1][:top_n] if contributions[i] > 0]
+        opposing = [(names[i], float(contributions[i])) for i in order[:top_n] if contributions[i] < 0]
+        return supporting, opposing
+
+    def decision_function(self, skill_lists: Sequence[Iterable[str]]) -> np.ndarray:
+        """Raw class scores, shape (n_rows, n_classes)"""
+        rows = [self.feature_indices(skills) for skills in skill_lists]
+        scores = np.tile(self.intercept, (len(rows), 1))
+        if len(rows) == 1:
+            if rows[0].size:
+                scores[0] += self.weights[rows[0]].sum(axis=0)
+            return scores
+
+        lengths = np.fromiter((row.size for row in rows), dtype=np.int64, count=len(rows))
+        if not lengths.any():
+            return scores
+        columns = np.concatenate(rows)
+        starts = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+        nonempty = lengths > 0
+        # Empty rows are skipped, so each reduceat segment ends at the next nonempty row
+        scores[nonempty] += np.add.reduceat(self.weights[columns], starts[nonempty], axis=0)
+        return scores
+
+    def predict_proba(self, skill_lists: Sequence[Iterable[str]]) -> np.ndarray:
+        """Class probabilities, matching the source model's predict_proba"""
+        return self.scores_to_proba(self.decision_function(skill_lists))
+
+    def scores_to_proba(self, scores: np.ndarray) -> np.ndarray:
+        """Softmax for multinomial models, normalized sigmoids for one-vs-rest"""
+        if self.multinomial:
+            scores = scores - scores.max(axis=1, keepdims=True)
+            np.exp(scores, out=scores)
+        else:
+            scores = 1.0 / (1.0 + np.exp(-scores))
+        scores /= scores.sum(axis=1, keepdims=True)
+        return scores
+
+    def predict(self, skill_lists: Sequence[Iterable[str]]) -> List[str]:
+        """Most likely class per row"""
+        return [str(label) for label in self.classes[self.decision_function(skill_lists).argmax(axis=1)]]
+
+
+def compile_scorer(clf, mlb):
+    """Compile a linear model into a LinearScorer (None if it is not linear)"""
+    if clf is None or mlb is None or not hasattr(clf, "coef_"):
+        return None
+    try:
+        return LinearScorer.from_sklearn(clf, mlb)
+    except Exception as e:
+        print(f"⚠️ Could not compile scorer, falling back to sklearn: {e}")
+        return None
+
+
+def is_multinomial(clf) -> bool:
+    """Whether a fitted sklearn linear classifier normalizes with a softmax"""
+    if not any(cls.__name__ == "LogisticRegression" for cls in type(clf).__mro__):
+        # SGDClassifier and friends are one-vs-rest
+        return False
+    multi_class = getattr(clf, "multi_class", "auto")
+    if multi_class == "ovr":
+        return False
+    if multi_class == "multinomial":
+        return True
+    # "auto" (and the deprecated default) picks one-vs-rest only for liblinear
+    return getattr(clf, "solver", "lbfgs") != "liblinear"
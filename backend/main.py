@@ -7,14 +7,20 @@ import uuid
 from typing import List
 from datetime import datetime
 from dotenv import load_dotenv
-from retrain_cron import retrain_model
+from retrain_cron import retrain_model, RETRAIN_MODES
+from retrain_jobs import RetrainJobRunner
 import pickle
 from fastapi.middleware.cors import CORSMiddleware
 
 
 # 🔁 Import real model logic
-from model_utils import predict_role_from_skills, predict_role_with_confidence
+from model_utils import (
+    predict_roles_batch, predict_top_roles, explain_role, DEFAULT_TOP_K, get_model_status,
+    get_prediction_cache_stats, get_inference_batcher_stats, reload_model, registry,
+)
+from model_sync import ModelVersionWatcher, ACTIVE_VERSION_QUERY
 from skill_extractor import skill_extractor
+from skill_sync import CustomSkillWatcher, CUSTOM_SKILLS_SIGNATURE_QUERY, CUSTOM_SKILLS_QUERY
 from gemini_service import gemini_service
 from huggingface_service import huggingface_service
 from pdf_processor import pdf_processor
@@ -24,6 +30,10 @@ load_dotenv()
 DATABASE_URL = os.getenv("DATABASE_URL")
 print("Loaded DATABASE_URL:", DATABASE_URL)
 
+# The model's own top-k roles replace the remote AI role suggestions unless
+# its best role is less likely than this
+ROLE_SUGGESTION_MIN_CONFIDENCE = float(os.getenv("ROLE_SUGGESTION_MIN_CONFIDENCE", "0.2"))
+
 # Create FastAPI app
 app = FastAPI()
 
@@ -51,6 +61,49 @@ def test_database_connection():
         print("❌ Database connection failed.")
         print(e)
         raise RuntimeError("Failed to connect to the database.") from e
+
+def fetch_custom_skills_signature():
+    """Row count and latest created_at of custom_skills; changes whenever a skill is added"""
+    with engine.connect() as conn:
+        return tuple(conn.execute(text(CUSTOM_SKILLS_SIGNATURE_QUERY)).one())
+
+def fetch_custom_skills():
+    """Every (skill, category) row of custom_skills"""
+    with engine.connect() as conn:
+        return [(row[0], row[1]) for row in conn.execute(text(CUSTOM_SKILLS_QUERY))]
+
+# Keeps this worker's skill dictionary in step with skills added on other workers
+skill_watcher = CustomSkillWatcher(skill_extractor, fetch_custom_skills_signature, fetch_custom_skills)
+
+@app.on_event("startup")
+def load_custom_skills():
+    try:
+        skill_watcher.check_once()
+        print(f"✅ Loaded custom skills (dictionary version {skill_extractor.dictionary_version}).")
+    except Exception as e:
+        print(f"⚠️ Could not load custom skills: {e}")
+    skill_watcher.start()
+
+@app.on_event("shutdown")
+def stop_skill_watcher():
+    skill_watcher.stop()
+
+def fetch_active_model_version():
+    """Active model version recorded in the database (None if none recorded yet)"""
+    with engine.connect() as conn:
+        return conn.execute(text(ACTIVE_VERSION_QUERY)).scalar()
+
+# Keeps this worker on the cluster-wide active model version
+model_watcher = ModelVersionWatcher(registry, fetch_active_model_version)
+
+@app.on_event("startup")
+def start_model_watcher():
+    model_watcher.check_once()
+    model_watcher.start()
+
+@app.on_event("shutdown")
+def stop_model_watcher():
+    model_watcher.stop()
 # ---------------------------------------------------
 
 def extract_skills(text: str) -> List[str]:
@@ -92,9 +145,15 @@ def extract_skills(text: str) -> List[str]:
 class ResumeInput(BaseModel):
     user_email: str
     resume_text: str
+    explain: bool = False
     
 class PredictRequest(BaseModel):
     skills: List[str]
+    top_k: int = DEFAULT_TOP_K
+    explain: bool = False
+
+class PredictBatchRequest(BaseModel):
+    skills: List[List[str]]
 
 class ConfirmRoleRequest(BaseModel):
     resume_id: str
@@ -104,13 +163,20 @@ class AddRoleRequest(BaseModel):
     name: str
     description: str = ""
 
+class AddSkillRequest(BaseModel):
+    name: str
+    category: str = "custom"
+
 
 # Internal function for resume analysis (used by upload endpoints)
 def analyze_resume_internal(payload: ResumeInput):
     skills = extract_skills(payload.resume_text)
     
-    # ✅ Use trained model for prediction with confidence
-    role, confidence_score = predict_role_with_confidence(skills)
+    # ✅ Use trained model for prediction with confidence (plus alternatives)
+    # An explanation must describe the model version that scored the resume
+    served = registry.get() if payload.explain else None
+    top_roles = predict_top_roles(skills, loaded=served)
+    role, confidence_score = top_roles[0]
     resume_id = str(uuid.uuid4())
 
     # Convert numpy float to Python float for database storage
@@ -133,12 +199,19 @@ def analyze_resume_internal(payload: ResumeInput):
     except OperationalError as e:
         raise HTTPException(status_code=500, detail="Database insert failed")
 
-    return {
+    result = {
         "id": resume_id,
         "skills": skills,
         "predicted_role": role,
-        "match_score": match_score
+        "match_score": match_score,
+        "alternative_roles": format_top_roles(top_roles[1:])
     }
+    if payload.explain:
+        result["explanation"] = explain_role(skills, role, loaded=served)
+    return result
+
+def format_top_roles(top_roles):
+    return [{"role": role, "score": score} for role, score in top_roles]
 
 @app.get("/health")
 def health_check():
@@ -149,40 +222,97 @@ def health_check():
     except Exception as e:
         return {"status": "error", "detail": str(e)}
 
+# Retraining runs in a child process; finished runs are swapped in here and
+# reach the other workers through the model version watcher
+# Job state lives next to the shared registry so any worker can report any job
+retrain_jobs = RetrainJobRunner(
+    retrain_model,
+    on_complete=lambda version: reload_model(),
+    state_dir=os.path.join(registry.registry_dir, ".retrain_jobs"),
+)
+
 @app.post("/retrain")
-def retrain():
+def retrain(mode: str = "full", wait: bool = False):
+    """
+    Start a background retrain (or join the one in progress) and return its job
+    mode=full re-fits everything (the default); mode=incremental opts in to
+    learning only from newly confirmed resumes
+    """
+    if mode not in RETRAIN_MODES:
+        raise HTTPException(status_code=400, detail=f"mode must be one of {list(RETRAIN_MODES)}")
     try:
-        retrain_model()
-        # Reload the model after retraining
-        from model_utils import reload_model
-        if reload_model():
-            return {"status": "success", "message": "Model retrained and reloaded successfully"}
+        job, deduplicated = retrain_jobs.submit(mode=mode)
+        if wait:
+            job = retrain_jobs.wait(job["job_id"])
+        
+        if job["status"] == "succeeded":
+            message = f"Model retrained (version {job['model_version']})" if job["model_version"] else "Nothing to retrain on"
+        elif job["status"] == "failed":
+            message = f"Retraining failed: {job['error']}"
+        elif deduplicated:
+            message = f"Retraining already in progress (job {job['job_id']})"
         else:
-            return {"status": "warning", "message": "Model retrained but failed to reload"}
+            message = f"Retraining started (job {job['job_id']})"
+        return {**job, "deduplicated": deduplicated, "message": message}
     except Exception as e:
         return {"status": "error", "message": str(e)}
-    
-    
-    
+
+@app.get("/retrain/{job_id}")
+def get_retrain_job(job_id: str):
+    """Progress, duration, sample count and published version of a retrain job"""
+    job = retrain_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Retrain job '{job_id}' not found")
+    return job
+
+@app.get("/model/version")
+def get_model_version():
+    """Model version currently served by this worker, the registry state and the cluster version"""
+    return {**get_model_status(), **model_watcher.status(), "inference_batching": get_inference_batcher_stats()}
+
 @app.post("/predict")
 def predict_skills(payload: PredictRequest):
     try:
-        # Use the same prediction function as /analyze endpoint
-        role, confidence_score = predict_role_with_confidence(payload.skills)
+        # Top-k roles come from the same probability vector as the best role
+        served = registry.get() if payload.explain else None
+        top_roles = predict_top_roles(payload.skills, max(1, payload.top_k), loaded=served)
+        role, confidence_score = top_roles[0]
         
         # Convert numpy float to Python float
         match_score = float(confidence_score)
         
-        return {
+        result = {
             "predicted_role": role,
-            "match_score": match_score
+            "match_score": match_score,
+            "top_roles": format_top_roles(top_roles)
         }
+        if payload.explain:
+            # Per-skill weights for the predicted role, no LLM call needed
+            result["explanation"] = explain_role(payload.skills, role, loaded=served)
+        return result
 
     except FileNotFoundError:
         raise HTTPException(status_code=500, detail="Model not found. Please retrain first.")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/predict/batch")
+def predict_skills_batch(payload: PredictBatchRequest):
+    """Score many skill lists with a single vectorized model call"""
+    try:
+        predictions = predict_roles_batch(payload.skills)
+        
+        return {
+            "predictions": [
+                {"predicted_role": role, "match_score": match_score}
+                for role, match_score in predictions
+            ],
+            "count": len(predictions)
+        }
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.post("/confirm-role")
 def confirm_role(payload: ConfirmRoleRequest):
     try:
@@ -190,7 +320,7 @@ def confirm_role(payload: ConfirmRoleRequest):
             # Update the confirmed_role for the given resume_id
             result = conn.execute(text("""
                 UPDATE resumes 
-                SET confirmed_role = :confirmed_role 
+                SET confirmed_role = :confirmed_role, confirmed_at = now()
                 WHERE id = :resume_id
                 RETURNING id, predicted_role, confirmed_role
             """), {
@@ -364,6 +494,51 @@ def get_available_skills():
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch skills: {str(e)}")
 
+@app.post("/skills")
+def add_custom_skill(payload: AddSkillRequest):
+    """Persist a custom skill and publish it to the skill extractor"""
+    try:
+        skill_name = payload.name.strip().lower()
+        category = payload.category.strip() or "custom"
+        if not skill_name:
+            raise HTTPException(status_code=400, detail="Skill name cannot be empty")
+        
+        with engine.begin() as conn:
+            conn.execute(text("""
+                INSERT INTO custom_skills (skill, category) 
+                VALUES (:skill, :category)
+                ON CONFLICT (skill, category) DO NOTHING
+            """), {
+                "skill": skill_name,
+                "category": category
+            })
+        
+        # Other workers pick the row up through their skill_watcher
+        skill_extractor.add_custom_skill(skill_name, category)
+        
+        return {
+            "message": f"Skill '{skill_name}' added successfully",
+            "skill": skill_name,
+            "category": category,
+            "dictionary_version": skill_extractor.dictionary_version
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to add skill: {str(e)}")
+
+@app.get("/cache/stats")
+def get_cache_stats():
+    """Hit/miss counters and occupancy of the skill extraction and prediction caches"""
+    return {
+        "skill_extraction": {
+            **skill_extractor.cache.stats(),
+            "dictionary_version": skill_extractor.dictionary_version
+        },
+        "prediction": get_prediction_cache_stats()
+    }
+
 @app.post("/extract-skills")
 def extract_skills_from_text(payload: dict):
     try:
@@ -371,7 +546,17 @@ def extract_skills_from_text(payload: dict):
         if not text:
             raise HTTPException(status_code=400, detail="Text is required")
         
-        skills = skill_extractor.extract_skills(text)
+        if payload.get("include_spans"):
+            skills, spans = skill_extractor.extract_skills(
+                text, fuzzy=payload.get("fuzzy"), include_spans=True
+            )
+            return {
+                "extracted_skills": skills,
+                "skill_count": len(skills),
+                "spans": spans
+            }
+        
+        skills = skill_extractor.extract_skills(text, fuzzy=payload.get("fuzzy"))
         return {
             "extracted_skills": skills,
             "skill_count": len(skills)
@@ -385,14 +570,24 @@ def analyze_resume_ai_internal(payload: ResumeInput):
         # Extract skills using both traditional and AI methods
         skills = extract_skills(payload.resume_text)
         
-        # Get AI role suggestions - try Google first, then Hugging Face
+        # Use ML model for primary prediction; its top-k doubles as role suggestions
+        served = registry.get() if payload.explain else None
+        top_roles = predict_top_roles(skills, loaded=served)
+        role, confidence_score = top_roles[0]
+        match_score = float(confidence_score)
+        
         ai_suggestions = {}
+        suggestions_source = "none"
         ai_provider = "none"
+        if confidence_score >= ROLE_SUGGESTION_MIN_CONFIDENCE:
+            ai_suggestions = {top_role: score for top_role, score in top_roles}
+            suggestions_source = "model"
         
-        if os.getenv("GOOGLE_API_KEY"):
+        # Otherwise get AI role suggestions - try Google first, then Hugging Face
+        elif os.getenv("GOOGLE_API_KEY"):
             try:
                 ai_suggestions = gemini_service.suggest_role_ai(skills, payload.resume_text)
-                ai_provider = "google"
+                ai_provider = suggestions_source = "google"
                 print(f"✅ Google Gemini role suggestions successful")
             except Exception as e:
                 print(f"❌ Google Gemini role suggestions failed: {e}")
@@ -400,17 +595,13 @@ def analyze_resume_ai_internal(payload: ResumeInput):
                 if os.getenv("HUGGINGFACE_API_TOKEN"):
                     try:
                         ai_suggestions = huggingface_service.suggest_role_ai(skills, payload.resume_text)
-                        ai_provider = "huggingface"
+                        ai_provider = suggestions_source = "huggingface"
                         print(f"✅ Hugging Face role suggestions successful")
                     except Exception as hf_e:
                         print(f"❌ Hugging Face role suggestions failed: {hf_e}")
                 else:
                     print(f"⚠️ No Hugging Face token configured for role suggestions fallback")
         
-        # Use ML model for primary prediction
-        role, confidence_score = predict_role_with_confidence(skills)
-        match_score = float(confidence_score)
-        
         # Generate AI feedback - try Google first, then Hugging Face
         ai_feedback = ""
         if os.getenv("GOOGLE_API_KEY"):
@@ -451,16 +642,21 @@ def analyze_resume_ai_internal(payload: ResumeInput):
         except OperationalError as e:
             raise HTTPException(status_code=500, detail="Database insert failed")
         
-        return {
+        result = {
             "id": resume_id,
             "skills": skills,
             "predicted_role": role,
             "match_score": match_score,
+            "alternative_roles": format_top_roles(top_roles[1:]),
             "ai_suggestions": ai_suggestions,
+            "suggestions_source": suggestions_source,
             "ai_feedback": ai_feedback,
             "ai_enhanced": ai_provider != "none",
             "ai_provider": ai_provider
         }
+        if payload.explain:
+            result["explanation"] = explain_role(skills, role, loaded=served)
+        return result
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"AI analysis failed: {str(e)}")
@@ -550,7 +746,8 @@ def generate_resume_feedback_ai(payload: dict):
 async def upload_resume(
     file: UploadFile = File(...),
     user_email: str = Form(...),
-    use_ai: bool = Form(False)
+    use_ai: bool = Form(False),
+    explain: bool = Form(False)
 ):
     """Upload and analyze a PDF resume"""
     try:
@@ -572,7 +769,7 @@ async def upload_resume(
             raise HTTPException(status_code=400, detail="Could not extract text from PDF")
         
         # Analyze the resume
-        payload = ResumeInput(user_email=user_email, resume_text=resume_text)
+        payload = ResumeInput(user_email=user_email, resume_text=resume_text, explain=explain)
         
         if use_ai:
             result = analyze_resume_ai_internal(payload)
@@ -596,7 +793,8 @@ async def upload_resume(
 async def upload_resume_text(
     user_email: str = Form(...),
     resume_text: str = Form(...),
-    use_ai: bool = Form(False)
+    use_ai: bool = Form(False),
+    explain: bool = Form(False)
 ):
     """Upload resume as text and analyze it"""
     try:
@@ -604,7 +802,7 @@ async def upload_resume_text(
             raise HTTPException(status_code=400, detail="Resume text cannot be empty")
         
         # Analyze the resume
-        payload = ResumeInput(user_email=user_email, resume_text=resume_text)
+        payload = ResumeInput(user_email=user_email, resume_text=resume_text, explain=explain)
         
         if use_ai:
             result = analyze_resume_ai_internal(payload)
@@ -0,0 +1,183 @@
+"""
+Memory-mapped model artifacts for the linear scorer
+
+A compiled LinearScorer is stored next to model.pkl as raw arrays:
+    weights.npy         float32 (n_features, n_classes), feature-major
+    intercept.npy       float64 (n_classes,)
+    vocab.bin           UTF-8 skill names, concatenated in sorted order
+    vocab_offsets.npy   int64 (n_features + 1,) byte offsets into vocab.bin
+    vocab_columns.npy   int32 (n_features,) feature column of each sorted skill
+    scorer.json         classes and normalization mode
+
+Arrays are opened with mmap, so every worker process on a host shares one
+page-cache copy and loading costs no deserialization.
+"""
+
+import copy
+import json
+import mmap
+import os
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+from sklearn.preprocessing import MultiLabelBinarizer
+
+from linear_scorer import LinearScorer
+
+WEIGHTS_FILE = "weights.npy"
+INTERCEPT_FILE = "intercept.npy"
+VOCAB_FILE = "vocab.bin"
+VOCAB_OFFSETS_FILE = "vocab_offsets.npy"
+VOCAB_COLUMNS_FILE = "vocab_columns.npy"
+SCORER_FILE = "scorer.json"
+
+# Set MODEL_MMAP=0 to always load the pickled model instead
+MMAP_ENABLED = os.getenv("MODEL_MMAP", "1") != "0"
+
+# Filler skill train_model.py gives roles that have no confirmed resumes yet
+PLACEHOLDER_SKILLS = frozenset({"Sample Skill"})
+
+
+class MappedVocabulary:
+    """
+    Read-only skill -> feature column lookup over a memory-mapped sorted vocabulary
+
+    Lookups binary-search the sorted names; only the pages touched are read.
+    Answers are memoized per process, since resumes keep naming the same skills.
+    """
+
+    def __init__(self, directory: str, memo_size: int = 50000):
+        # Plain ndarray views of the maps: np.memmap scalar indexing is much slower
+        self._offsets = np.asarray(np.load(os.path.join(directory, VOCAB_OFFSETS_FILE), mmap_mode="r"))
+        self._columns = np.asarray(np.load(os.path.join(directory, VOCAB_COLUMNS_FILE), mmap_mode="r"))
+        self._size = len(self._columns)
+        self._memo: Dict[str, Optional[int]] = {}
+        self.memo_size = memo_size
+        with open(os.path.join(directory, VOCAB_FILE), "rb") as f:
+            # mmap cannot map an empty file
+            self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if self._size else b""
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __contains__(self, skill: str) -> bool:
+        return self.get(skill) is not None
+
+    def _name(self, position: int) -> bytes:
+        return self._data[int(self._offsets[position]):int(self._offsets[position + 1])]
+
+    def get(self, skill: str, default: Optional[int] = None) -> Optional[int]:
+        """Feature column of a skill, or default if it is not in the vocabulary"""
+        try:
+            column = self._memo[skill]
+        except KeyError:
+            if len(self._memo) >= self.memo_size:
+                self._memo.clear()
+            column = self._memo[skill] = self._search(skill)
+        return default if column is None else column
+
+    def _search(self, skill: str) -> Optional[int]:
+        key = skill.encode("utf-8")
+        low, high = 0, self._size
+        while low < high:
+            middle = (low + high) // 2
+            if self._name(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self._size and self._name(low) == key:
+            return int(self._columns[low])
+        return None
+
+
+def prune_scorer(scorer: LinearScorer, drop_skills: Iterable[str] = PLACEHOLDER_SKILLS,
+                 tolerance: float = 0.0) -> LinearScorer:
+    """
+    Copy of a scorer without dead features, re-indexed to contiguous skill IDs
+
+    Features whose weights are all within tolerance of zero add nothing to any
+    score (with the default tolerance predictions are unchanged); placeholder
+    skills are dropped regardless of their weights.
+    """
+    weights = np.asarray(scorer.weights)
+    drop_skills = set(drop_skills)
+    alive = np.abs(weights).max(axis=1) > tolerance if weights.size else np.zeros(len(weights), dtype=bool)
+    kept = sorted(
+        (skill, column) for skill, column in scorer.vocabulary.items()
+        if alive[column] and skill not in drop_skills
+    )
+    # Skill IDs follow the sorted vocabulary, matching the order of vocab.bin
+    columns = np.array([column for _, column in kept], dtype=np.int64)
+    return LinearScorer.from_weights(
+        {skill: skill_id for skill_id, (skill, _) in enumerate(kept)},
+        np.ascontiguousarray(weights[columns], dtype=np.float32),
+        scorer.intercept,
+        scorer.classes,
+        scorer.multinomial,
+    )
+
+
+def prune_model(model, mlb, drop_skills: Iterable[str] = PLACEHOLDER_SKILLS,
+                tolerance: float = 0.0) -> Tuple[object, MultiLabelBinarizer]:
+    """
+    Copy of a fitted linear model and binarizer without dead features
+
+    Drops the same features as prune_scorer, so the pickled model and the
+    scorer arrays of a version give the same scores. Models without coef_
+    (e.g. tree ensembles) are returned unchanged.
+    """
+    if not hasattr(model, "coef_"):
+        return model, mlb
+    coef = np.asarray(model.coef_)
+    drop_skills = set(drop_skills)
+    alive = np.abs(coef).max(axis=0) > tolerance if coef.size else np.zeros(coef.shape[1], dtype=bool)
+    kept = [column for column, skill in enumerate(mlb.classes_) if alive[column] and skill not in drop_skills]
+    if len(kept) == len(mlb.classes_):
+        return model, mlb
+
+    pruned = copy.deepcopy(model)
+    pruned.coef_ = np.ascontiguousarray(coef[:, kept])
+    pruned.n_features_in_ = len(kept)
+    pruned_mlb = MultiLabelBinarizer(classes=[mlb.classes_[column] for column in kept])
+    pruned_mlb.fit([])
+    return pruned, pruned_mlb
+
+
+def save_scorer(scorer: LinearScorer, directory: str):
+    """Write a compiled scorer as raw arrays into a (staging) version directory"""
+    names = sorted(
+        ((skill.encode("utf-8"), column) for skill, column in scorer.vocabulary.items()),
+        key=lambda item: item[0],
+    )
+    offsets = np.zeros(len(names) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(name) for name, _ in names])
+
+    np.save(os.path.join(directory, WEIGHTS_FILE), np.ascontiguousarray(scorer.weights, dtype=np.float32))
+    np.save(os.path.join(directory, INTERCEPT_FILE), np.asarray(scorer.intercept, dtype=np.float64))
+    np.save(os.path.join(directory, VOCAB_OFFSETS_FILE), offsets)
+    np.save(os.path.join(directory, VOCAB_COLUMNS_FILE), np.array([column for _, column in names], dtype=np.int32))
+    with open(os.path.join(directory, VOCAB_FILE), "wb") as f:
+        f.write(b"".join(name for name, _ in names))
+    with open(os.path.join(directory, SCORER_FILE), "w") as f:
+        json.dump({
+            "classes": [str(label) for label in scorer.classes],
+            "multinomial": bool(scorer.multinomial),
+        }, f)
+
+
+def has_scorer(directory: str) -> bool:
+    """Whether a version directory contains mapped scorer arrays"""
+    return os.path.exists(os.path.join(directory, SCORER_FILE))
+
+
+def load_scorer(directory: str) -> LinearScorer:
+    """Open a saved scorer with its arrays memory-mapped"""
+    with open(os.path.join(directory, SCORER_FILE)) as f:
+        spec = json.load(f)
+    return LinearScorer.from_weights(
+        MappedVocabulary(directory),
+        np.asarray(np.load(os.path.join(directory, WEIGHTS_FILE), mmap_mode="r")),
+        np.load(os.path.join(directory, INTERCEPT_FILE)),
+        spec["classes"],
+        spec["multinomial"],
+    )
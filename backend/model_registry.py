@@ -0,0 +1,319 @@
+"""
+Versioned model registry with atomic publishing and hot swapping
+
+Layout under MODEL_REGISTRY_DIR:
+    <version>/model.pkl         (clf, mlb) tuple, same format as the legacy model.pkl
+    <version>/metadata.json     training details for the version
+    <version>/*.npy, vocab.bin  memory-mapped scorer arrays (see model_artifacts.py)
+    ACTIVE                      name of the version currently served
+    ESTIMATOR.json              estimator for full fits, from select_model.py
+    .retrain_jobs/              shared retrain job state (see retrain_jobs.py)
+
+Artifacts are written to a temporary directory and renamed into place, and
+ACTIVE is replaced atomically, so readers never observe a half-written model.
+In multi-node deployments MODEL_REGISTRY_DIR should be shared storage; see
+model_sync.py for how workers follow the active version.
+"""
+
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+import joblib
+
+from linear_scorer import compile_scorer
+from model_artifacts import MMAP_ENABLED, has_scorer, load_scorer, prune_model, save_scorer
+
+REGISTRY_DIR = os.getenv("MODEL_REGISTRY_DIR", os.path.join(os.path.dirname(__file__), "models"))
+ACTIVE_FILE = "ACTIVE"
+MODEL_FILE = "model.pkl"
+METADATA_FILE = "metadata.json"
+
+# Pre-registry model, served as version "legacy" until a version is published
+LEGACY_MODEL_PATH = os.path.join(os.path.dirname(__file__), "model.pkl")
+LEGACY_VERSION = "legacy"
+
+# Number of published versions kept on disk (the active one is always kept)
+KEEP_VERSIONS = int(os.getenv("MODEL_REGISTRY_KEEP", "5"))
+
+
+class LoadedModel:
+    """
+    An immutable (model, mlb, scorer) bundle for one version; swapped as a unit
+
+    Versions with mapped scorer arrays are served from those alone; the
+    pickled sklearn model is only read if something asks for .model or .mlb
+    (compact versions have none, and both are None).
+    """
+
+    __slots__ = ("version", "_model", "_mlb", "model_path", "scorer", "metadata", "loaded_at")
+
+    def __init__(self, version: str, model=None, mlb=None, metadata: Optional[Dict[str, Any]] = None,
+                 scorer=None, model_path: Optional[str] = None):
+        self.version = version
+        self._model = model
+        self._mlb = mlb
+        self.model_path = model_path
+        self.scorer = scorer if scorer is not None else compile_scorer(model, mlb)
+        self.metadata = metadata or {}
+        self.loaded_at = datetime.utcnow()
+
+    def _load_pickle(self):
+        if self._model is None and self.model_path and os.path.exists(self.model_path):
+            self._model, self._mlb = joblib.load(self.model_path)
+
+    @property
+    def model(self):
+        self._load_pickle()
+        return self._model
+
+    @property
+    def mlb(self):
+        self._load_pickle()
+        return self._mlb
+
+    @property
+    def classes(self):
+        if self.scorer is not None:
+            return self.scorer.classes
+        return self.model.classes_
+
+
+def _write_atomically(path: str, content: str):
+    """Write a small text file via temp file + fsync + rename"""
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write(content)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def new_version() -> str:
+    """Sortable, collision-free version name"""
+    return f"{datetime.utcnow().strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}"
+
+
+def publish_model(model, mlb, metadata: Optional[Dict[str, Any]] = None,
+                  registry_dir: str = REGISTRY_DIR, activate: bool = True) -> str:
+    """
+    Write a new model version and (optionally) make it the active one
+
+    Returns the new version name.
+    """
+    # Pruned once, so the pickle and the mapped arrays hold the same features
+    model, mlb = prune_model(model, mlb)
+
+    def write(staging_dir: str):
+        joblib.dump((model, mlb), os.path.join(staging_dir, MODEL_FILE))
+        scorer = compile_scorer(model, mlb)
+        if scorer is not None:
+            save_scorer(scorer, staging_dir)
+
+    metadata = {
+        **(metadata or {}),
+        "classes": [str(label) for label in model.classes_],
+        "n_features": len(mlb.classes_),
+    }
+    return _publish(write, metadata, registry_dir, activate)
+
+
+def publish_scorer(scorer, metadata: Optional[Dict[str, Any]] = None,
+                   registry_dir: str = REGISTRY_DIR, activate: bool = True) -> str:
+    """Publish a compact version holding only scorer arrays (no pickled sklearn model)"""
+    metadata = {
+        **(metadata or {}),
+        "classes": [str(label) for label in scorer.classes],
+        "n_features": scorer.n_features,
+    }
+    return _publish(lambda staging_dir: save_scorer(scorer, staging_dir), metadata, registry_dir, activate)
+
+
+def _publish(write: Callable[[str], None], metadata: Dict[str, Any], registry_dir: str, activate: bool) -> str:
+    """Write artifacts into a staging directory, rename it into place and activate it"""
+    os.makedirs(registry_dir, exist_ok=True)
+    version = new_version()
+    staging_dir = os.path.join(registry_dir, f".staging-{version}")
+    os.makedirs(staging_dir)
+
+    try:
+        write(staging_dir)
+        metadata = {**metadata, "version": version, "created_at": datetime.utcnow().isoformat()}
+        with open(os.path.join(staging_dir, METADATA_FILE), "w") as f:
+            json.dump(metadata, f, indent=2)
+        os.rename(staging_dir, os.path.join(registry_dir, version))
+    except Exception:
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        raise
+
+    if activate:
+        activate_version(version, registry_dir)
+    # An inactive version is about to be activated by the caller, so it is kept too
+    _prune_versions(registry_dir, published=version)
+    print(f"📦 Published model version {version}")
+    return version
+
+
+def activate_version(version: str, registry_dir: str = REGISTRY_DIR):
+    """Point ACTIVE at an already published version"""
+    if not os.path.isdir(os.path.join(registry_dir, version)):
+        raise FileNotFoundError(f"Model version '{version}' not found in {registry_dir}")
+    _write_atomically(os.path.join(registry_dir, ACTIVE_FILE), version)
+
+
+def active_version(registry_dir: str = REGISTRY_DIR) -> Optional[str]:
+    """Name of the active version on disk, or None if nothing is published"""
+    try:
+        with open(os.path.join(registry_dir, ACTIVE_FILE)) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def list_versions(registry_dir: str = REGISTRY_DIR) -> List[str]:
+    """Published versions, oldest first"""
+    if not os.path.isdir(registry_dir):
+        return []
+    return sorted(
+        name for name in os.listdir(registry_dir)
+        if not name.startswith(".") and os.path.isdir(os.path.join(registry_dir, name))
+    )
+
+
+def load_version(version: str, registry_dir: str = REGISTRY_DIR) -> LoadedModel:
+    """Load a published version (or the legacy model.pkl) from disk"""
+    if version == LEGACY_VERSION:
+        model, mlb = joblib.load(LEGACY_MODEL_PATH)
+        return LoadedModel(LEGACY_VERSION, model, mlb, {"version": LEGACY_VERSION})
+
+    version_dir = os.path.join(registry_dir, version)
+    try:
+        with open(os.path.join(version_dir, METADATA_FILE)) as f:
+            metadata = json.load(f)
+    except FileNotFoundError:
+        metadata = {"version": version}
+
+    model_path = os.path.join(version_dir, MODEL_FILE)
+    # Compact (exported) versions have no pickle, so they always load from arrays
+    if has_scorer(version_dir) and (MMAP_ENABLED or not os.path.exists(model_path)):
+        # No unpickling: the arrays are mapped and shared through the page cache
+        return LoadedModel(version, metadata=metadata, scorer=load_scorer(version_dir), model_path=model_path)
+    model, mlb = joblib.load(model_path)
+    return LoadedModel(version, model, mlb, metadata)
+
+
+def _prune_versions(registry_dir: str, published: Optional[str] = None):
+    """Delete the oldest versions beyond KEEP_VERSIONS, never the active or just published one"""
+    protected = {active_version(registry_dir), published} - {None}
+    stale = [version for version in list_versions(registry_dir) if version not in protected]
+    for version in stale[:max(0, len(stale) - max(0, KEEP_VERSIONS - len(protected)))]:
+        shutil.rmtree(os.path.join(registry_dir, version), ignore_errors=True)
+
+
+class ModelRegistry:
+    """
+    In-process view of the registry
+
+    The served model is a single LoadedModel reference: readers take it once
+    per request and never see a torn (model, mlb) pair, and reload() swaps it
+    with one assignment. Failed loads back off exponentially (bounded) so a
+    missing or broken model is not re-read from disk on every request.
+    """
+
+    def __init__(self, registry_dir: str = REGISTRY_DIR, min_backoff: float = 1.0, max_backoff: float = 60.0):
+        self.registry_dir = registry_dir
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+        self._active: Optional[LoadedModel] = None
+        self._load_lock = threading.Lock()
+        self._failures = 0
+        self._retry_at = 0.0
+        self._failed_version: Optional[str] = None
+        self._swap_listeners: List[Callable[[LoadedModel], None]] = []
+        self.last_error: Optional[str] = None
+
+    def add_swap_listener(self, listener: Callable[[LoadedModel], None]):
+        """Call listener(new_model) every time a version is swapped in"""
+        self._swap_listeners.append(listener)
+
+    @property
+    def active(self) -> Optional[LoadedModel]:
+        """The currently served model, without triggering a load"""
+        return self._active
+
+    def get(self) -> Optional[LoadedModel]:
+        """The served model, loading it first if none is loaded and the backoff allows"""
+        current = self._active
+        if current is not None:
+            return current
+        if time.monotonic() < self._retry_at:
+            return None
+        self.reload()
+        return self._active
+
+    def reload(self, version: Optional[str] = None) -> bool:
+        """
+        Load a version (default: the one ACTIVE points at) and swap it in
+
+        Returns False if loading failed; the current model keeps being served.
+        """
+        with self._load_lock:
+            version = version or active_version(self.registry_dir) or LEGACY_VERSION
+            try:
+                loaded = load_version(version, self.registry_dir)
+            except Exception as e:
+                self._failures += 1
+                self._failed_version = version
+                delay = min(self.max_backoff, self.min_backoff * 2 ** (self._failures - 1))
+                self._retry_at = time.monotonic() + delay
+                self.last_error = f"{type(e).__name__}: {e}"
+                print(f"❌ Failed to load model version {version} (retry in {delay:.0f}s): {e}")
+                return False
+
+            self._active = loaded
+            self._failures = 0
+            self._retry_at = 0.0
+            self._failed_version = None
+            self.last_error = None
+            print(f"✅ Loaded model version {loaded.version}")
+            print(f"📊 Model classes: {list(loaded.classes)}")
+            for listener in self._swap_listeners:
+                listener(loaded)
+            return True
+
+    def sync(self, version: str) -> bool:
+        """
+        Serve the given version, loading it only if it is not already served
+
+        A version that just failed to load (e.g. its artifacts have not reached
+        shared storage yet) is retried only once its backoff has elapsed.
+        """
+        current = self._active
+        if current is not None and current.version == version:
+            return True
+        if version == self._failed_version and time.monotonic() < self._retry_at:
+            return False
+        return self.reload(version)
+
+    def publish(self, model, mlb, metadata: Optional[Dict[str, Any]] = None) -> str:
+        """Publish a new version, make it active and swap it in"""
+        version = publish_model(model, mlb, metadata, self.registry_dir)
+        self.reload()
+        return version
+
+    def status(self) -> Dict[str, Any]:
+        """Served and on-disk versions, for health/version endpoints"""
+        current = self._active
+        return {
+            "active_version": current.version if current else None,
+            "loaded_at": current.loaded_at.isoformat() if current else None,
+            "metadata": current.metadata if current else None,
+            "published_version": active_version(self.registry_dir),
+            "available_versions": list_versions(self.registry_dir),
+            "last_error": self.last_error,
+        }
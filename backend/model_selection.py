@@ -0,0 +1,217 @@
+"""
+Cross-validated model selection for the role classifier
+Scores candidate classifiers with k-fold CV (folds run in parallel across
+cores), then measures what each would cost in production: training time,
+artifact size and single-prediction latency on the serving path
+"""
+
+import io
+import json
+import os
+import statistics
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import joblib
+import numpy as np
+from joblib import Parallel, delayed
+from sklearn.base import clone
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression, SGDClassifier
+from sklearn.model_selection import StratifiedKFold
+
+from linear_scorer import compile_scorer
+from model_artifacts import prune_scorer
+from model_registry import REGISTRY_DIR
+from training_data import TrainingSet
+
+DEFAULT_FOLDS = 5
+DEFAULT_C_VALUES = (0.1, 1.0, 10.0)
+
+# p95 single-prediction latency a model must meet to be promoted
+DEFAULT_LATENCY_BUDGET_MS = 5.0
+
+# Estimator chosen by the last promotion, read by every later full fit
+ESTIMATOR_FILE = "ESTIMATOR.json"
+
+# Estimator classes a saved choice may name
+ESTIMATOR_CLASSES = {cls.__name__: cls for cls in (LogisticRegression, SGDClassifier)}
+
+
+def default_estimator():
+    """Estimator used until a model selection has been promoted"""
+    return LogisticRegression(random_state=42, max_iter=1000)
+
+
+def save_estimator_choice(name: str, estimator, registry_dir: str = REGISTRY_DIR) -> Dict[str, Any]:
+    """Record a promoted candidate's class and non-default parameters in the registry"""
+    cls = type(estimator)
+    if ESTIMATOR_CLASSES.get(cls.__name__) is not cls:
+        raise ValueError(f"{cls.__name__} cannot be used for full fits")
+    defaults = cls().get_params()
+    choice = {
+        "candidate": name,
+        "estimator": cls.__name__,
+        "params": {key: value for key, value in estimator.get_params().items() if value != defaults.get(key)},
+        "selected_at": datetime.utcnow().isoformat(),
+    }
+    os.makedirs(registry_dir, exist_ok=True)
+    path = os.path.join(registry_dir, ESTIMATOR_FILE)
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    with open(tmp_path, "w") as f:
+        json.dump(choice, f, indent=2)
+    os.replace(tmp_path, path)
+    return choice
+
+
+def build_estimator(registry_dir: str = REGISTRY_DIR) -> Tuple[Any, str]:
+    """
+    Unfitted estimator for a full fit and its candidate name
+
+    Follows the last promoted selection; without one (or if it cannot be
+    read) the default LogisticRegression is used.
+    """
+    path = os.path.join(registry_dir, ESTIMATOR_FILE)
+    if os.path.exists(path):
+        try:
+            with open(path) as f:
+                choice = json.load(f)
+            return ESTIMATOR_CLASSES[choice["estimator"]](**choice["params"]), choice["candidate"]
+        except Exception as e:
+            print(f"⚠️ Could not use the selected estimator in {path}, using the default: {e}")
+    return default_estimator(), "default"
+
+
+def default_candidates(c_values: Sequence[float] = DEFAULT_C_VALUES) -> List[Tuple[str, Any]]:
+    """(name, unfitted estimator) pairs to compare"""
+    candidates = [
+        (f"logistic_regression(C={c:g})", LogisticRegression(C=c, random_state=42, max_iter=1000))
+        for c in c_values
+    ]
+    candidates.append(("sgd_log_loss", SGDClassifier(loss="log_loss", random_state=42)))
+    # n_jobs=1: parallelism comes from running folds side by side
+    candidates.append(("random_forest", RandomForestClassifier(n_estimators=100, random_state=42, n_jobs=1)))
+    return candidates
+
+
+def _fit_and_score(estimator, X, y, train: np.ndarray, test: np.ndarray) -> Tuple[float, float]:
+    """Fit on one fold; returns (accuracy, fit seconds)"""
+    start = time.perf_counter()
+    estimator.fit(X[train], y[train])
+    fit_seconds = time.perf_counter() - start
+    return float((estimator.predict(X[test]) == y[test]).mean()), fit_seconds
+
+
+def cross_validate_candidates(candidates: Sequence[Tuple[str, Any]], data: TrainingSet,
+                              folds: int = DEFAULT_FOLDS, n_jobs: int = -1) -> Dict[str, Dict[str, float]]:
+    """
+    Mean/std accuracy and mean fit time per candidate
+
+    Every (candidate, fold) pair is an independent job, so all cores stay busy
+    even when one candidate is much slower than the others.
+    """
+    _, class_counts = np.unique(data.y, return_counts=True)
+    if not len(class_counts) or class_counts.max() < 2:
+        raise ValueError("Cross-validation needs at least one role with two or more samples")
+    # Stratification needs every fold to be able to hold the largest class
+    folds = max(2, min(folds, int(class_counts.max())))
+    splits = list(StratifiedKFold(n_splits=folds, shuffle=True, random_state=42).split(data.X, data.y))
+
+    jobs = [(name, clone(estimator), train, test) for name, estimator in candidates for train, test in splits]
+    scores = Parallel(n_jobs=n_jobs)(
+        delayed(_fit_and_score)(estimator, data.X, data.y, train, test) for _, estimator, train, test in jobs
+    )
+
+    results: Dict[str, Dict[str, float]] = {}
+    for name, _ in candidates:
+        fold_scores = [score for (job_name, *_), score in zip(jobs, scores) if job_name == name]
+        accuracies = [accuracy for accuracy, _ in fold_scores]
+        results[name] = {
+            "folds": folds,
+            "accuracy_mean": statistics.mean(accuracies),
+            "accuracy_std": statistics.pstdev(accuracies),
+            "cv_fit_seconds": statistics.mean(seconds for _, seconds in fold_scores),
+        }
+    return results
+
+
+def artifact_bytes(model, mlb) -> int:
+    """Size of the pickled (model, mlb) pair as the registry stores it"""
+    buffer = io.BytesIO()
+    joblib.dump((model, mlb), buffer)
+    return buffer.getbuffer().nbytes
+
+
+def prediction_latency(model, mlb, skill_lists: Sequence[Sequence[str]], repeat: int = 200) -> Dict[str, float]:
+    """
+    Single-row predict_proba latency in milliseconds
+
+    Uses the path model_utils would serve the model with: the compiled
+    NumPy scorer for linear models, sklearn otherwise.
+    """
+    scorer = compile_scorer(model, mlb)
+    if scorer is not None:
+        scorer = prune_scorer(scorer)
+        predict = scorer.predict_proba
+    else:
+        predict = lambda rows: model.predict_proba(mlb.transform(rows))
+
+    timings = []
+    for i in range(repeat):
+        skills = [skill_lists[i % len(skill_lists)]]
+        start = time.perf_counter()
+        predict(skills)
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return {
+        "p50": timings[len(timings) // 2],
+        "p95": timings[min(len(timings) - 1, int(len(timings) * 0.95))],
+        "mean": statistics.mean(timings),
+    }
+
+
+def select_model(data: TrainingSet, candidates: Optional[Sequence[Tuple[str, Any]]] = None,
+                 folds: int = DEFAULT_FOLDS, latency_budget_ms: float = DEFAULT_LATENCY_BUDGET_MS,
+                 n_jobs: int = -1, latency_repeat: int = 200) -> Dict[str, Any]:
+    """
+    Evaluate candidates and pick the most accurate one within the latency budget
+
+    Only linear candidates can be picked; others (e.g. random_forest) are
+    reported for comparison. Returns the report: per-candidate results
+    (accuracy, fit time, artifact size, latency), the chosen candidate name
+    (None if no linear candidate meets the budget) and the fitted models by name.
+    """
+    candidates = list(candidates if candidates is not None else default_candidates())
+    results = cross_validate_candidates(candidates, data, folds, n_jobs)
+
+    mlb = data.binarizer()
+    skill_lists = [list(data.skills[data.X.indices[start:end]]) for start, end in zip(data.X.indptr[:-1], data.X.indptr[1:])]
+    models = {}
+    for name, estimator in candidates:
+        model = clone(estimator)
+        start = time.perf_counter()
+        model.fit(data.X, data.y)
+        results[name]["fit_seconds"] = time.perf_counter() - start
+        results[name]["artifact_bytes"] = artifact_bytes(model, mlb)
+        # Measured one model at a time so timings do not compete for cores
+        results[name]["latency_ms"] = prediction_latency(model, mlb, skill_lists, latency_repeat)
+        results[name]["within_budget"] = results[name]["latency_ms"]["p95"] <= latency_budget_ms
+        # Incremental retraining and explanations need a linear model
+        results[name]["promotable"] = compile_scorer(model, mlb) is not None
+        models[name] = model
+
+    eligible = [name for name in results if results[name]["within_budget"] and results[name]["promotable"]]
+    selected = max(
+        eligible,
+        key=lambda name: (results[name]["accuracy_mean"], -results[name]["latency_ms"]["p95"]),
+        default=None,
+    )
+    return {
+        "n_samples": data.n_samples,
+        "n_features": data.n_features,
+        "latency_budget_ms": latency_budget_ms,
+        "results": results,
+        "selected": selected,
+        "models": models,
+    }
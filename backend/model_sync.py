@@ -0,0 +1,167 @@
+"""
+Cluster-wide propagation of the active model version
+
+The model_versions table records which registry version is active. Every
+worker runs a ModelVersionWatcher that polls it (one indexed single-row
+query) and hot-loads a new version from the shared registry directory in the
+background, so all processes converge on the same model without restarts.
+If the database is unreachable the watcher falls back to the registry's
+ACTIVE file.
+"""
+
+import json
+import os
+import threading
+from typing import Any, Callable, Dict, Optional
+
+from model_registry import REGISTRY_DIR, ModelRegistry, activate_version, active_version, publish_model
+
+# Seconds between checks of the active version
+MODEL_SYNC_INTERVAL = float(os.getenv("MODEL_SYNC_INTERVAL", "5"))
+
+ACTIVE_VERSION_QUERY = "SELECT version FROM model_versions WHERE is_active LIMIT 1"
+
+# Session-level advisory lock held while a model is trained and published
+TRAINING_LOCK_ID = 7_246_311_500
+
+
+class TrainingInProgress(Exception):
+    """Another process (on any node) is already training a model"""
+
+
+def acquire_training_lock(conn):
+    """
+    Take the cluster-wide training lock on conn, or raise TrainingInProgress
+
+    The lock belongs to the database session: it is released when conn is
+    closed, including when the training process dies.
+    """
+    with conn.cursor() as cur:
+        cur.execute("SELECT pg_try_advisory_lock(%s)", (TRAINING_LOCK_ID,))
+        acquired = cur.fetchone()[0]
+    conn.commit()
+    if not acquired:
+        raise TrainingInProgress("another process is already training a model")
+
+
+def record_active_version(conn, version: str, metadata: Optional[Dict[str, Any]] = None):
+    """
+    Mark a published version as the active one for the whole cluster
+
+    conn is a DB-API (psycopg2) connection; the switch is one transaction so
+    there is never more than one active row.
+    """
+    with conn.cursor() as cur:
+        cur.execute("UPDATE model_versions SET is_active = FALSE WHERE is_active AND version <> %s", (version,))
+        cur.execute(
+            """
+            INSERT INTO model_versions (version, is_active, metadata, activated_at)
+            VALUES (%s, TRUE, %s, now())
+            ON CONFLICT (version) DO UPDATE SET is_active = TRUE, activated_at = now()
+            """,
+            (version, json.dumps(metadata or {})),
+        )
+    conn.commit()
+    print(f"📣 Model version {version} recorded as active")
+
+
+def activate_published_version(conn, version: str, metadata: Optional[Dict[str, Any]] = None,
+                               registry_dir: str = REGISTRY_DIR):
+    """
+    Make a version published with activate=False active cluster-wide, database first
+
+    The version is only activated locally once the database records it, so a
+    failed database write never leaves this node serving a version the rest
+    of the cluster does not know about.
+    """
+    try:
+        record_active_version(conn, version, metadata)
+    except Exception:
+        conn.rollback()
+        print(f"❌ Could not record model version {version}; it was published but not activated")
+        raise
+    activate_version(version, registry_dir)
+
+
+def publish_active_model(conn, model, mlb, metadata: Optional[Dict[str, Any]] = None,
+                         registry_dir: str = REGISTRY_DIR) -> str:
+    """Publish a model and make it active cluster-wide (see activate_published_version)"""
+    version = publish_model(model, mlb, metadata, registry_dir, activate=False)
+    activate_published_version(conn, version, metadata, registry_dir)
+    return version
+
+
+class ModelVersionWatcher:
+    """
+    Background thread that keeps a ModelRegistry on the cluster's active version
+
+    fetch_version returns the version recorded in the database (None if none
+    is recorded yet); loading happens on the watcher thread, so requests keep
+    being served by the current model until the new one is swapped in.
+    """
+
+    def __init__(self, registry: ModelRegistry, fetch_version: Optional[Callable[[], Optional[str]]] = None,
+                 interval: float = MODEL_SYNC_INTERVAL):
+        self.registry = registry
+        self.fetch_version = fetch_version
+        self.interval = interval
+        self.last_seen_version: Optional[str] = None
+        self.source: Optional[str] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._fetch_failed = False
+
+    def start(self):
+        """Start polling (no-op if already running)"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="model-version-watcher", daemon=True)
+        self._thread.start()
+        print(f"👀 Watching for model version changes every {self.interval:g}s")
+
+    def stop(self):
+        """Stop polling and wait for the thread to exit"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 1)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.check_once()
+            except Exception as e:
+                print(f"⚠️ Model version check failed: {e}")
+
+    def check_once(self) -> Optional[str]:
+        """Look up the active version and swap it in if it changed; returns that version"""
+        version = None
+        if self.fetch_version is not None:
+            try:
+                version = self.fetch_version()
+                self.source = "database"
+                self._fetch_failed = False
+            except Exception as e:
+                if not self._fetch_failed:
+                    # Log once per outage, not on every poll
+                    print(f"⚠️ Could not read active model version from database, using registry: {e}")
+                self._fetch_failed = True
+        if version is None:
+            version = active_version(self.registry.registry_dir)
+            self.source = "registry"
+        if version is None:
+            return None
+
+        self.last_seen_version = version
+        self.registry.sync(version)
+        return version
+
+    def status(self) -> Dict[str, Any]:
+        """Cluster version as last observed by this worker"""
+        return {
+            "cluster_version": self.last_seen_version,
+            "source": self.source,
+            "interval_seconds": self.interval,
+            "running": self._thread is not None and self._thread.is_alive(),
+        }
@@ -1,72 +1,179 @@
 # model_utils.py
 import os
-import joblib
 
-# Model path
-MODEL_PATH = os.path.join(os.path.dirname(__file__), "model.pkl")
+import numpy as np
+
+from cache_utils import LRUCache
+from inference_batcher import InferenceBatcher
+from model_registry import ModelRegistry, LEGACY_MODEL_PATH
+
+# Legacy model path (served until a version is published to the registry)
+MODEL_PATH = LEGACY_MODEL_PATH
+
+# Served model; swapped atomically as a (version, model, mlb, scorer) unit
+registry = ModelRegistry()
 
 def load_model():
-    """Load model and label binarizer"""
-    try:
-        model, mlb = joblib.load(MODEL_PATH)
-        return model, mlb
-    except Exception as e:
-        print(f"❌ Failed to load model: {e}")
+    """Load model and label binarizer of the active version"""
+    current = registry.get()
+    if current is None:
         return None, None
+    return current.model, current.mlb
 
 # Load model at startup
-model, mlb = load_model()
-if model is not None:
-    print("✅ Loaded model successfully.")
-    print(f"📊 Model classes: {list(model.classes_)}")
-else:
+if not registry.reload():
     print("❌ Model not loaded.")
 
+# Probability rows of recently scored skill sets, keyed by (version, skills);
+# extraction keeps at most 15 skills, so many resumes share the same set
+PREDICTION_CACHE_MAX_BYTES = int(os.getenv("PREDICTION_CACHE_MAX_BYTES", str(8 * 1024 * 1024)))
+prediction_cache = LRUCache(PREDICTION_CACHE_MAX_BYTES)
+
+# Rows of a replaced model can never be hit again
+registry.add_swap_listener(lambda loaded: prediction_cache.clear())
+
+def _prediction_key(version: str, skills: list[str]) -> tuple:
+    """Order and duplicates do not change a prediction"""
+    return (version, tuple(sorted(set(skills))))
+
+def get_prediction_cache_stats():
+    """Hit/miss counters of the prediction cache and the version it serves"""
+    current = registry.active
+    return {**prediction_cache.stats(), "model_version": current.version if current else None}
+
 def predict_role_from_skills(skills: list[str]) -> str:
-    if not model or not mlb:
-        return "Unknown (Model not loaded)"
-    
-    # MultiLabelBinarizer expects a list of skill lists
-    skill_vector = mlb.transform([skills])
-    prediction = model.predict(skill_vector)
-    return prediction[0]
+    return predict_top_roles(skills, k=1)[0][0]
 
 def reload_model():
-    """Reload the model from disk"""
-    global model, mlb
-    model, mlb = load_model()
-    if model is not None:
-        print("✅ Model reloaded successfully.")
-        print(f"📊 Model classes: {list(model.classes_)}")
-    return model is not None
+    """Reload the active model version from disk and swap it in"""
+    return registry.reload()
+
+def get_model_status():
+    """Active model version and registry state"""
+    return registry.status()
+
+# Number of roles returned by the top-k prediction helpers
+DEFAULT_TOP_K = 3
 
 def predict_role_with_confidence(skills: list[str]) -> tuple[str, float]:
     """
     Predict role and return confidence score (probability)
     Returns: (predicted_role, confidence_score)
     """
-    global model, mlb
+    return predict_top_roles(skills, k=1)[0]
+
+def predict_roles_batch(skill_lists: list[list[str]]) -> list[tuple[str, float]]:
+    """
+    Predict roles for many skill lists with one transform and one predict_proba call
+    Returns: [(predicted_role, confidence_score), ...] in input order
+    """
+    return [top_roles[0] for top_roles in predict_top_roles_batch(skill_lists, k=1)]
+
+def predict_top_roles(skills: list[str], k: int = DEFAULT_TOP_K, loaded=None) -> list[tuple[str, float]]:
+    """
+    Predict the k most likely roles, best first
+    loaded pins the LoadedModel to score with (e.g. to explain the same version)
+    Returns: [(role, probability), ...]
+    """
+    if inference_batcher is not None and loaded is None:
+        return inference_batcher.predict((skills, k))
+    return predict_top_roles_batch([skills], k, loaded)[0]
+
+def _predict_queued(requests: list[tuple[list[str], int]]) -> list[list[tuple[str, float]]]:
+    """Score queued (skills, k) requests in one call, then trim each to its own k"""
+    top_roles = predict_top_roles_batch([skills for skills, _ in requests], max(k for _, k in requests))
+    return [roles[:max(1, k)] for roles, (_, k) in zip(top_roles, requests)]
+
+# Opt-in micro-batching of concurrent single predictions (INFERENCE_BATCHING=1):
+# requests wait up to INFERENCE_BATCH_MAX_WAIT_MS to share one scoring call
+INFERENCE_BATCHING = os.getenv("INFERENCE_BATCHING", "0") == "1"
+inference_batcher = InferenceBatcher(
+    _predict_queued,
+    max_batch_size=int(os.getenv("INFERENCE_BATCH_MAX_SIZE", "64")),
+    max_wait=float(os.getenv("INFERENCE_BATCH_MAX_WAIT_MS", "2")) / 1000,
+) if INFERENCE_BATCHING else None
+
+def get_inference_batcher_stats():
+    """Micro-batching counters, or None when batching is disabled"""
+    return inference_batcher.stats() if inference_batcher is not None else None
+
+def predict_top_roles_batch(skill_lists: list[list[str]], k: int = DEFAULT_TOP_K,
+                            loaded=None) -> list[list[tuple[str, float]]]:
+    """
+    Predict the k most likely roles for many skill lists from one probability matrix
+    loaded pins the LoadedModel to score with; by default the served one is used
+    Returns: one best-first [(role, probability), ...] list per input, in input order
+    """
+    # Take the served model once so the whole batch uses a single version;
+    # a missing model is reloaded at most once per backoff interval
+    current = loaded if loaded is not None else registry.get()
+    if current is None:
+        return [[("Unknown (Model not loaded)", 0.0)]] * len(skill_lists)
     
-    # Try to reload model if not loaded
-    if not model or not mlb:
-        if not reload_model():
-            return "Unknown (Model not loaded)", 0.0
+    if not skill_lists:
+        return []
     
     try:
-        # MultiLabelBinarizer expects a list of skill lists
-        skill_vector = mlb.transform([skills])
+        keys = [_prediction_key(current.version, skills) for skills in skill_lists]
+        rows = [prediction_cache.get(key) for key in keys]
+        missing = [i for i, row in enumerate(rows) if row is None]
+        if missing:
+            # Every uncached ranking comes out of a single predict_proba call
+            missing_skills = [skill_lists[i] for i in missing]
+            if current.scorer is not None:
+                scored = current.scorer.predict_proba(missing_skills)
+            else:
+                # MultiLabelBinarizer expects a list of skill lists
+                scored = current.model.predict_proba(current.mlb.transform(missing_skills))
+            for i, row in zip(missing, scored):
+                # Copy so a cached row does not keep the whole batch matrix alive
+                rows[i] = row.copy()
+                prediction_cache.put(keys[i], rows[i])
+        probabilities = np.vstack(rows)
+        top_indices, top_scores = _top_k(probabilities, k)
         
-        # Get prediction
-        prediction = model.predict(skill_vector)
-        predicted_role = prediction[0]
-        
-        # Get probability for the predicted class
-        probabilities = model.predict_proba(skill_vector)
-        predicted_class_index = list(model.classes_).index(predicted_role)
-        confidence_score = float(probabilities[0][predicted_class_index])  # Convert to Python float
-        
-        return predicted_role, confidence_score
+        return [
+            [(str(current.classes[index]), float(score)) for index, score in zip(indices, scores)]  # Convert to Python types
+            for indices, scores in zip(top_indices, top_scores)
+        ]
     except Exception as e:
         print(f"❌ Prediction error: {e}")
-        return "Unknown (Prediction error)", 0.0
+        return [[("Unknown (Prediction error)", 0.0)]] * len(skill_lists)
+
+# Number of supporting/opposing skills returned by explain_role
+DEFAULT_EXPLAIN_TOP_N = 5
+
+def explain_role(skills: list[str], role: str, top_n: int = DEFAULT_EXPLAIN_TOP_N, loaded=None):
+    """
+    Skills that contributed most for and against a role, from the linear model weights
+    Pass the LoadedModel the prediction was scored with, so a model swap in
+    between cannot explain a different version; by default the served one is used
+    Returns: {"supporting": [...], "opposing": [...], "model_version"} or None if unavailable
+    """
+    current = loaded if loaded is not None else registry.get()
+    if current is None or current.scorer is None:
+        return None
+    
+    matches = np.flatnonzero(current.scorer.classes == role)
+    if not matches.size:
+        return None
+    
+    supporting, opposing = current.scorer.explain(skills, int(matches[0]), top_n)
+    return {
+        "role": role,
+        "supporting": [{"skill": skill, "weight": weight} for skill, weight in supporting],
+        "opposing": [{"skill": skill, "weight": weight} for skill, weight in opposing],
+        "model_version": current.version
+    }
 
+def _top_k(probabilities: np.ndarray, k: int) -> tuple[np.ndarray, np.ndarray]:
+    """Column indices and values of the k largest entries per row, best first"""
+    k = max(1, min(k, probabilities.shape[1]))
+    if k == 1:
+        indices = probabilities.argmax(axis=1)[:, np.newaxis]
+    else:
+        # argpartition finds the top k in linear time; only those k get sorted
+        indices = np.argpartition(probabilities, -k, axis=1)[:, -k:]
+        order = np.argsort(-np.take_along_axis(probabilities, indices, axis=1), axis=1, kind="stable")
+        indices = np.take_along_axis(indices, order, axis=1)
+    return indices, np.take_along_axis(probabilities, indices, axis=1)
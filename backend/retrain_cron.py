@@ -1,93 +1,170 @@
+import argparse
+import copy
 import os
-import joblib
 import psycopg2
-import pandas as pd
 from dotenv import load_dotenv
-from sklearn.preprocessing import MultiLabelBinarizer
-from sklearn.linear_model import LogisticRegression
+from model_registry import LEGACY_VERSION, active_version, load_version
+from model_sync import acquire_training_lock, publish_active_model
+from incremental_training import FullRefitRequired, as_incremental, grow_vocabulary
+from model_selection import build_estimator
+from feature_cache import CACHE_ENABLED, load_training_set_cached
+from training_data import CONFIRMED_RESUMES_QUERY, database_time, load_training_set
 
 load_dotenv()
 DATABASE_URL = os.getenv("DATABASE_URL").replace("postgresql+psycopg2", "postgresql")
 
-def retrain_model():
-    print("🔁 Starting retraining...")
-    
+# "full" re-fits every confirmed resume; "incremental" only learns from
+# resumes confirmed since the active model's watermark
+RETRAIN_MODES = ("full", "incremental")
+
+def _no_progress(stage, **details):
+    pass
+
+def retrain_model(progress=_no_progress, mode="full"):
+    """
+    Retrain on confirmed resumes and publish the result; returns the new model version
+    progress(stage, **details) is called as training moves through its stages
+    """
+    if mode not in RETRAIN_MODES:
+        raise ValueError(f"Unknown retrain mode '{mode}' (expected one of {RETRAIN_MODES})")
+    print(f"🔁 Starting retraining ({mode})...")
+
     try:
+        progress("loading", mode=mode)
         conn = psycopg2.connect(DATABASE_URL)
-        df = pd.read_sql("SELECT extracted_skills, confirmed_role FROM resumes WHERE confirmed_role IS NOT NULL", conn)
-
-        if df.empty:
-            print("⚠️ No confirmed resume records to retrain on.")
-            return
-
-        print(f"📊 Found {len(df)} confirmed resumes for training")
-        
-        # Debug: Check the data format
-        print(f"📈 Sample skills format: {df['extracted_skills'].iloc[0]} (type: {type(df['extracted_skills'].iloc[0])})")
-        
-        # Ensure skills are in the correct format (list of strings)
-        # PostgreSQL arrays might be read as strings or other formats
-        def normalize_skills(skills):
-            if skills is None:
-                return []
-            if isinstance(skills, str):
-                # If it's a string, try to parse it
-                import ast
+        try:
+            # Only one retrain at a time across all workers and nodes
+            acquire_training_lock(conn)
+            if mode == "incremental":
                 try:
-                    return ast.literal_eval(skills)
-                except:
-                    return [skills]
-            elif isinstance(skills, list):
-                return skills
-            else:
-                return [str(skills)]
-        
-        df['extracted_skills'] = df['extracted_skills'].apply(normalize_skills)
-        
-        # Filter out empty skill lists
-        df = df[df['extracted_skills'].apply(len) > 0]
-        
-        if df.empty:
-            print("⚠️ No records with valid skills found.")
-            return
-
-        # Show distribution of confirmed roles
-        role_counts = df["confirmed_role"].value_counts()
-        print("📈 Role distribution:")
-        for role, count in role_counts.items():
-            print(f"   {role}: {count}")
-
-        # Use the same preprocessing as train_model.py
-        mlb = MultiLabelBinarizer()
-        X = mlb.fit_transform(df["extracted_skills"])
-        y = df["confirmed_role"]
-
-        # Check if we have enough data for each role (at least 2 samples per role)
-        min_samples_per_role = 2
-        role_counts = df["confirmed_role"].value_counts()
-        insufficient_roles = role_counts[role_counts < min_samples_per_role]
-        
-        if not insufficient_roles.empty:
-            print(f"⚠️ Warning: Some roles have fewer than {min_samples_per_role} samples:")
-            for role, count in insufficient_roles.items():
-                print(f"   {role}: {count} samples")
-            print("   Consider confirming more roles for better model performance.")
-
-        # Use LogisticRegression for consistent probability estimates
-        clf = LogisticRegression(random_state=42, max_iter=1000)
-        clf.fit(X, y)
-
-        # Save model + binarizer (same format as train_model.py)
-        joblib.dump((clf, mlb), "model.pkl")
-
-        print(f"✅ Retrained on {len(df)} samples with {len(clf.classes_)} classes")
-        print(f"📈 Classes: {list(clf.classes_)}")
-
-        conn.close()
-        
+                    return _retrain_incremental(conn, progress)
+                except FullRefitRequired as e:
+                    print(f"↩️ Falling back to a full re-fit: {e}")
+                    progress("loading", mode="full", fallback_reason=str(e))
+            return _retrain_full(conn, progress)
+        finally:
+            conn.close()
+
     except Exception as e:
         print(f"❌ Retraining failed: {str(e)}")
         raise
 
+def _reading(progress):
+    """Chunk callback reporting how many rows have been streamed so far"""
+    return lambda rows_read: progress("loading", rows_read=rows_read)
+
+def _retrain_full(conn, progress):
+    """Fit a new model on every confirmed resume"""
+    if CACHE_ENABLED:
+        # Cached matrix plus the rows confirmed since it was written
+        data, watermark = load_training_set_cached(conn, on_chunk=_reading(progress))
+    else:
+        watermark = database_time(conn)
+        # Streamed in chunks into a sparse matrix (same column layout as MultiLabelBinarizer)
+        data = load_training_set(conn, on_chunk=_reading(progress))
+    progress("loaded", n_samples=data.n_samples)
+
+    if data.n_samples == 0:
+        if data.skipped:
+            print("⚠️ No records with valid skills found.")
+            progress("skipped", reason="no records with valid skills")
+        else:
+            print("⚠️ No confirmed resume records to retrain on.")
+            progress("skipped", reason="no confirmed resumes")
+        return
+
+    print(f"📊 Found {data.n_samples} confirmed resumes for training ({data.skipped} without skills skipped)")
+
+    # Show distribution of confirmed roles
+    role_counts = data.role_counts()
+    print("📈 Role distribution:")
+    for role, count in role_counts.items():
+        print(f"   {role}: {count}")
+
+    # Use the same preprocessing as train_model.py
+    mlb = data.binarizer()
+    X = data.X
+    y = data.y
+
+    # Check if we have enough data for each role (at least 2 samples per role)
+    min_samples_per_role = 2
+    insufficient_roles = {role: count for role, count in role_counts.items() if count < min_samples_per_role}
+
+    if insufficient_roles:
+        print(f"⚠️ Warning: Some roles have fewer than {min_samples_per_role} samples:")
+        for role, count in insufficient_roles.items():
+            print(f"   {role}: {count} samples")
+        print("   Consider confirming more roles for better model performance.")
+
+    # The estimator promoted by select_model.py (LogisticRegression by default)
+    clf, estimator_name = build_estimator()
+    progress("training", n_samples=data.n_samples, n_features=data.n_features, n_classes=len(role_counts),
+             estimator=estimator_name)
+    clf.fit(X, y)
+
+    progress("publishing")
+    # The watermark lets later incremental runs pick up only newer confirmations
+    metadata = {"n_samples": data.n_samples, "trainer": "retrain_cron", "mode": "full", "watermark": watermark,
+                "estimator": estimator_name}
+    # Other workers and nodes pick the new version up from the database
+    version = publish_active_model(conn, clf, mlb, metadata)
+
+    print(f"✅ Retrained on {data.n_samples} samples with {len(clf.classes_)} classes")
+    print(f"📈 Classes: {list(clf.classes_)}")
+    return version
+
+def _retrain_incremental(conn, progress):
+    """Continue training the active model on resumes confirmed after its watermark"""
+    base_version = active_version()
+    if base_version is None or base_version == LEGACY_VERSION:
+        raise FullRefitRequired("no published model to continue from")
+    base = load_version(base_version)
+    if base.model is None or not hasattr(base.model, "coef_"):
+        # Compact exports (export_model.py) are arrays only and cannot be trained further
+        raise FullRefitRequired(f"version {base_version} has no pickled linear model to continue from")
+    watermark = base.metadata.get("watermark")
+    if watermark is None:
+        raise FullRefitRequired(f"version {base_version} has no training watermark")
+
+    new_watermark = database_time(conn)
+    data = load_training_set(
+        conn, CONFIRMED_RESUMES_QUERY + " AND confirmed_at > %(watermark)s",
+        {"watermark": watermark}, on_chunk=_reading(progress),
+    )
+    progress("loaded", n_samples=data.n_samples, watermark=watermark)
+
+    if data.n_samples == 0:
+        print(f"⚠️ No resumes confirmed since {watermark}; version {base_version} is up to date.")
+        progress("skipped", reason="no new confirmations")
+        return
+
+    # partial_fit cannot add classes
+    new_roles = sorted(set(data.y) - set(base.model.classes_))
+    if new_roles:
+        raise FullRefitRequired(f"new roles since last fit: {new_roles}")
+
+    clf = as_incremental(copy.deepcopy(base.model), base.metadata.get("n_samples", 0))
+    mlb = grow_vocabulary(clf, base.mlb, [data.skills])
+    X = data.reindex(mlb.classes_)
+    progress("training", n_samples=data.n_samples, n_features=X.shape[1], n_classes=len(clf.classes_))
+    clf.partial_fit(X, data.y)
+
+    progress("publishing")
+    metadata = {
+        "n_samples": base.metadata.get("n_samples", 0) + data.n_samples,
+        "n_new_samples": data.n_samples,
+        "trainer": "retrain_cron",
+        "mode": "incremental",
+        "base_version": base_version,
+        "watermark": new_watermark,
+    }
+    version = publish_active_model(conn, clf, mlb, metadata)
+
+    print(f"✅ Incrementally trained on {data.n_samples} new samples ({X.shape[1]} features)")
+    return version
+
 if __name__ == "__main__":
-    retrain_model()
+    parser = argparse.ArgumentParser(description="Retrain the role model on confirmed resumes")
+    parser.add_argument("--mode", choices=RETRAIN_MODES, default="full",
+                        help="full re-fit (e.g. nightly) or incremental update from the last watermark")
+    retrain_model(mode=parser.parse_args().mode)
@@ -0,0 +1,236 @@
+"""
+Background retraining jobs
+Runs retrain_model() in a separate process so requests return immediately,
+and tracks progress, timing and the published version per job
+
+With a state_dir on shared storage (e.g. inside the model registry) job state
+is written to one JSON file per job, so every worker and node can report any
+job and join a run another worker started.
+"""
+
+import json
+import multiprocessing
+import os
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional, Tuple
+
+# Finished jobs kept for GET /retrain/{job_id}
+MAX_FINISHED_JOBS = 50
+
+ACTIVE_STATUSES = ("queued", "running")
+
+# A running job whose worker has not written its state for this long is
+# reported as failed (e.g. the worker process was killed)
+HEARTBEAT_INTERVAL = 5.0
+STALE_AFTER = 30.0
+
+
+def _run_job(target: Callable, options: Dict[str, Any], events):
+    """Child process entry point: run target and report back through the events queue"""
+    def progress(stage: str, **details):
+        events.put(("progress", stage, details))
+
+    try:
+        events.put(("done", target(progress=progress, **options), None))
+    except BaseException as e:
+        events.put(("failed", None, f"{type(e).__name__}: {e}"))
+
+
+class RetrainJobRunner:
+    """
+    Runs one retraining job at a time in a child process
+
+    Submitting while a job is queued or running returns that job instead of
+    starting another (whatever its options), so concurrent retrain requests
+    share a single run. With a state_dir this also covers jobs started by
+    other workers; target is still expected to take its own cross-process
+    lock, since two workers can submit at the same moment.
+    on_complete(version) is called in this process after a successful run.
+    """
+
+    def __init__(self, target: Callable, on_complete: Optional[Callable[[Optional[str]], Any]] = None,
+                 state_dir: Optional[str] = None, stale_after: float = STALE_AFTER):
+        self.target = target
+        self.on_complete = on_complete
+        self.state_dir = state_dir
+        self.stale_after = stale_after
+        self._context = multiprocessing.get_context("spawn")  # forking a threaded server is unsafe
+        self._jobs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._current: Optional[str] = None
+        self._lock = threading.Lock()
+        if state_dir is not None:
+            os.makedirs(state_dir, exist_ok=True)
+
+    def submit(self, **options) -> Tuple[Dict[str, Any], bool]:
+        """
+        Start a job (or join the one in progress); returns (job status, deduplicated)
+        options are passed to the target as keyword arguments
+        """
+        with self._lock:
+            if self._current is not None and self._jobs[self._current]["status"] in ACTIVE_STATUSES:
+                return dict(self._jobs[self._current]), True
+            shared = self._active_shared_job()
+            if shared is not None:
+                return shared, True
+
+            job_id = uuid.uuid4().hex
+            self._jobs[job_id] = {
+                "job_id": job_id,
+                "options": options,
+                "status": "queued",
+                "stage": None,
+                "progress": {},
+                "submitted_at": datetime.utcnow().isoformat(),
+                "heartbeat_at": datetime.utcnow().isoformat(),
+                "started_at": None,
+                "finished_at": None,
+                "duration_seconds": None,
+                "n_samples": None,
+                "model_version": None,
+                "error": None,
+            }
+            self._current = job_id
+            self._save(job_id)
+            self._prune()
+            threading.Thread(target=self._supervise, args=(job_id, options), name=f"retrain-{job_id[:8]}", daemon=True).start()
+            return dict(self._jobs[job_id]), False
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Status of a job (started by any worker sharing state_dir), or None if unknown"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                return {**job, "progress": dict(job["progress"])}
+        return self._load(job_id)
+
+    def wait(self, job_id: str, timeout: Optional[float] = None, poll_interval: float = 0.2) -> Optional[Dict[str, Any]]:
+        """Block until a job finishes (or the timeout passes) and return its status"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            job = self.get(job_id)
+            if job is None or job["status"] not in ACTIVE_STATUSES:
+                return job
+            if deadline is not None and time.monotonic() >= deadline:
+                return job
+            time.sleep(poll_interval)
+
+    def _update(self, job_id: str, **fields):
+        with self._lock:
+            self._jobs[job_id].update(fields, heartbeat_at=datetime.utcnow().isoformat())
+            self._save(job_id)
+
+    def _state_path(self, job_id: str) -> str:
+        return os.path.join(self.state_dir, f"{job_id}.json")
+
+    def _save(self, job_id: str):
+        """Write a job's state for the other workers (caller holds the lock)"""
+        if self.state_dir is None:
+            return
+        path = self._state_path(job_id)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump(self._jobs[job_id], f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"⚠️ Could not write retrain job state: {e}")
+
+    def _load(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """A job's shared state; active jobs that stopped reporting are returned as failed"""
+        if self.state_dir is None or not all(char in "0123456789abcdef" for char in job_id):
+            return None
+        try:
+            with open(self._state_path(job_id)) as f:
+                job = json.load(f)
+        except (OSError, ValueError):
+            return None
+        heartbeat = datetime.fromisoformat(job["heartbeat_at"])
+        if job["status"] in ACTIVE_STATUSES and (datetime.utcnow() - heartbeat).total_seconds() > self.stale_after:
+            job.update(status="failed", error="Retrain worker stopped reporting")
+        return job
+
+    def _active_shared_job(self) -> Optional[Dict[str, Any]]:
+        """A queued or running job of another worker, if any"""
+        if self.state_dir is None:
+            return None
+        for name in os.listdir(self.state_dir):
+            if name.endswith(".json"):
+                job = self._load(name[:-len(".json")])
+                if job is not None and job["status"] in ACTIVE_STATUSES:
+                    return job
+        return None
+
+    def _supervise(self, job_id: str, options: Dict[str, Any]):
+        """Start the child process and follow its events until it exits"""
+        events = self._context.Queue()
+        process = self._context.Process(target=_run_job, args=(self.target, options, events), name=f"retrain-{job_id[:8]}")
+        started = time.monotonic()
+        process.start()
+        self._update(job_id, status="running", started_at=datetime.utcnow().isoformat())
+        print(f"🔁 Retrain job {job_id} started (pid {process.pid})")
+
+        outcome = None
+        last_saved = time.monotonic()
+        while outcome is None:
+            if time.monotonic() - last_saved >= HEARTBEAT_INTERVAL:
+                self._update(job_id)
+                last_saved = time.monotonic()
+            try:
+                kind, value, details = events.get(timeout=1.0)
+            except queue.Empty:
+                if not process.is_alive():
+                    outcome = ("failed", None, f"Retrain process exited with code {process.exitcode}")
+                continue
+            if kind == "progress":
+                with self._lock:
+                    job = self._jobs[job_id]
+                    job["stage"] = value
+                    job["progress"].update(details)
+                    if "n_samples" in details:
+                        job["n_samples"] = details["n_samples"]
+                    job["heartbeat_at"] = datetime.utcnow().isoformat()
+                    self._save(job_id)
+                last_saved = time.monotonic()
+            else:
+                outcome = (kind, value, details)
+        process.join()
+
+        kind, version, error = outcome
+        finished = {"finished_at": datetime.utcnow().isoformat(), "duration_seconds": time.monotonic() - started}
+        if kind == "failed":
+            self._update(job_id, status="failed", error=error, **finished)
+            print(f"❌ Retrain job {job_id} failed: {error}")
+            return
+
+        if version is not None and self.on_complete is not None:
+            try:
+                self.on_complete(version)
+            except Exception as e:
+                print(f"⚠️ Retrain job {job_id} completion hook failed: {e}")
+        self._update(job_id, status="succeeded", model_version=version, **finished)
+        print(f"✅ Retrain job {job_id} finished: version {version}")
+
+    def _prune(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job["status"] not in ACTIVE_STATUSES]
+        for job_id in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self._jobs[job_id]
+        if self.state_dir is None:
+            return
+        try:
+            # Shared state files of any worker, oldest first
+            paths = sorted(
+                (os.path.join(self.state_dir, name) for name in os.listdir(self.state_dir) if name.endswith(".json")),
+                key=os.path.getmtime,
+            )
+            for path in paths[:max(0, len(paths) - MAX_FINISHED_JOBS)]:
+                job = self._load(os.path.basename(path)[:-len(".json")])
+                if job is None or job["status"] not in ACTIVE_STATUSES:
+                    os.remove(path)
+        except OSError:
+            # Another worker pruned the same files
+            pass
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Choose the role classifier by cross-validation and publish it if it is fast enough
+Compares candidate classifiers and regularization strengths on the same data
+train_model.py uses, writes a report, and promotes the most accurate linear
+candidate whose p95 prediction latency fits the budget
+"""
+
+import argparse
+import json
+import platform
+import sys
+from datetime import datetime
+
+import psycopg2
+
+from model_selection import (DEFAULT_C_VALUES, DEFAULT_FOLDS, DEFAULT_LATENCY_BUDGET_MS,
+                             default_candidates, save_estimator_choice, select_model)
+from model_sync import acquire_training_lock, publish_active_model
+from train_model import DATABASE_URL, TRAINING_QUERY
+from training_data import load_training_set
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cross-validated model selection with a latency budget")
+    parser.add_argument("--folds", type=int, default=DEFAULT_FOLDS)
+    parser.add_argument("--c-values", type=float, nargs="+", default=list(DEFAULT_C_VALUES),
+                        help="LogisticRegression regularization strengths to try")
+    parser.add_argument("--latency-budget-ms", type=float, default=DEFAULT_LATENCY_BUDGET_MS,
+                        help="maximum p95 single-prediction latency for promotion")
+    parser.add_argument("--jobs", type=int, default=-1, help="parallel CV jobs (-1: all cores)")
+    parser.add_argument("--no-promote", action="store_true", help="only write the report")
+    parser.add_argument("--output", default="model_selection.json")
+    args = parser.parse_args()
+
+    print("🧪 Model Selection")
+    print("=" * 60)
+
+    conn = psycopg2.connect(DATABASE_URL)
+    try:
+        acquire_training_lock(conn)
+        data = load_training_set(conn, TRAINING_QUERY)
+        if data.n_samples == 0:
+            print("No training data found.")
+            return 1
+        print(f"📊 {data.n_samples} samples, {data.n_features} skills, {len(data.role_counts())} roles")
+
+        report = select_model(data, default_candidates(args.c_values), args.folds,
+                              args.latency_budget_ms, args.jobs)
+        results = report["results"]
+        for name, result in sorted(results.items(), key=lambda item: -item[1]["accuracy_mean"]):
+            latency = result["latency_ms"]
+            marker = "✅" if result["within_budget"] and result["promotable"] else ("🐢" if result["promotable"] else "📋")
+            print(f"{marker} {name:<30} "
+                  f"acc {result['accuracy_mean']:.3f}±{result['accuracy_std']:.3f} | "
+                  f"fit {result['fit_seconds']:.2f}s | {result['artifact_bytes']:>10,} bytes | "
+                  f"p50 {latency['p50']:.3f} ms, p95 {latency['p95']:.3f} ms")
+
+        selected = report["selected"]
+        promoted_version = None
+        if selected is None:
+            print(f"❌ No linear candidate meets the {args.latency_budget_ms} ms p95 latency budget; nothing promoted")
+        elif args.no_promote:
+            print(f"🏆 Best within budget: {selected} (not promoted)")
+        else:
+            metadata = {
+                "n_samples": data.n_samples,
+                "trainer": "select_model",
+                "candidate": selected,
+                "cv_accuracy": results[selected]["accuracy_mean"],
+                "latency_p95_ms": results[selected]["latency_ms"]["p95"],
+            }
+            promoted_version = publish_active_model(conn, report["models"][selected], data.binarizer(), metadata)
+            # Later full re-fits (train_model.py, retrain_cron.py) build this estimator
+            choice = save_estimator_choice(selected, report["models"][selected])
+            print(f"🏆 Promoted {selected} as version {promoted_version} ({choice['estimator']} {choice['params']})")
+    finally:
+        conn.close()
+
+    with open(args.output, "w") as f:
+        json.dump({
+            "timestamp": datetime.utcnow().isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            **{key: value for key, value in report.items() if key != "models"},
+            "promoted_version": promoted_version,
+        }, f, indent=2)
+    print(f"\n💾 Report saved to {args.output}")
+    return 0 if selected is not None else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,14 +3,128 @@ Intelligent Skill Extraction from Resume Text
 Uses multiple approaches to identify technical skills, tools, and technologies
 """
 
+import os
 import re
-from typing import List, Set, Dict
+import json
+import hashlib
+import threading
+from types import MappingProxyType
+from typing import Any, Iterable, List, Mapping, Optional, Set, Dict, Tuple, Union
+from bisect import bisect_right
 from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from skill_matcher import FuzzySkillIndex, SkillMatcher, Match
+from cache_utils import LRUCache
+
+# Memory budget for cached extraction results
+DEFAULT_CACHE_MAX_BYTES = int(os.getenv("SKILL_CACHE_MAX_BYTES", 32 * 1024 * 1024))
+
+# Alias/abbreviation -> canonical skill table, loaded once at import
+ALIASES_PATH = os.getenv("SKILL_ALIASES_PATH", os.path.join(os.path.dirname(__file__), "skill_aliases.json"))
+
+def load_aliases(path: str = ALIASES_PATH) -> Dict[str, str]:
+    """Load the alias table from JSON, lowercasing both sides"""
+    try:
+        with open(path, encoding="utf-8") as f:
+            return {alias.lower(): skill.lower() for alias, skill in json.load(f).items()}
+    except Exception as e:
+        print(f"⚠️ Could not load skill aliases from {path}: {e}")
+        return {}
+
+DEFAULT_ALIASES = load_aliases()
+
+# Typo-tolerant matching is opt-in; it recovers near-misses from noisy PDF text
+DEFAULT_FUZZY = os.getenv("SKILL_FUZZY_MATCHING", "false").lower() in ("1", "true", "yes")
+
+# Word-like tokens, keeping inner punctuation such as node.js, ci/cd or c++
+TOKEN_PATTERN = re.compile(r"\w[\w+#]*(?:[./-]\w[\w+#]*)*")
+
+# Resume section headings (lowercase) -> section name reported with match spans
+SECTION_HEADINGS = {
+    "summary": "summary", "professional summary": "summary", "profile": "summary",
+    "objective": "summary", "about me": "summary",
+    "skills": "skills", "technical skills": "skills", "core competencies": "skills",
+    "technologies": "skills", "tools": "skills", "expertise": "skills",
+    "experience": "experience", "work experience": "experience",
+    "professional experience": "experience", "employment history": "experience",
+    "projects": "projects", "personal projects": "projects",
+    "education": "education", "certifications": "certifications",
+    "certificates": "certifications", "publications": "publications",
+}
+
+# A heading starts a line and is followed by a colon or the end of the line
+SECTION_PATTERN = re.compile(
+    r"^[ \t]*(" + "|".join(sorted(map(re.escape, SECTION_HEADINGS), key=len, reverse=True)) + r")[ \t]*(?::|$)",
+    re.MULTILINE
+)
+
+class SkillDictionary:
+    """
+    Immutable, versioned snapshot of the skill dictionary and its compiled matcher
+    
+    Updates never modify a snapshot; they build a new one with a higher version,
+    which SkillExtractor publishes with a single reference assignment.
+    Aliases are compiled into the same matcher and only take effect while
+    their canonical skill is part of the dictionary.
+    """
+    
+    def __init__(self, skills_db: Mapping[str, Iterable[str]], aliases: Mapping[str, str] = None, version: int = 0):
+        self.skills_db = MappingProxyType({
+            category: frozenset(skill.lower() for skill in skills)
+            for category, skills in skills_db.items()
+        })
+        self.all_skills = frozenset().union(*self.skills_db.values())
+        self.aliases = MappingProxyType(dict(aliases or {}))
+        
+        # Dictionary skills first, so an alias can never shadow a real skill
+        patterns = {skill: skill for skill in self.all_skills}
+        for alias, skill in self.aliases.items():
+            if skill in self.all_skills:
+                patterns.setdefault(alias, skill)
+        self.matcher = SkillMatcher(patterns)
+        self.version = version
+        self._fuzzy_index: Optional[FuzzySkillIndex] = None
+    
+    @property
+    def fuzzy_index(self) -> FuzzySkillIndex:
+        """Typo index over all_skills, built on first use"""
+        # A racing duplicate build is harmless; both results are equivalent
+        if self._fuzzy_index is None:
+            self._fuzzy_index = FuzzySkillIndex(self.all_skills)
+        return self._fuzzy_index
+    
+    def with_skills(self, skills: Iterable[Tuple[str, str]]) -> "SkillDictionary":
+        """Return a new snapshot that also contains the given (skill, category) pairs"""
+        skills_db = {category: set(category_skills) for category, category_skills in self.skills_db.items()}
+        for skill, category in skills:
+            skills_db.setdefault(category, set()).add(skill.lower())
+        return SkillDictionary(skills_db, self.aliases, self.version + 1)
+    
+    def with_aliases(self, aliases: Mapping[str, str]) -> "SkillDictionary":
+        """Return a new snapshot with additional alias -> canonical skill entries"""
+        merged = dict(self.aliases)
+        merged.update((alias.lower(), skill.lower()) for alias, skill in aliases.items())
+        return SkillDictionary(self.skills_db, merged, self.version + 1)
+    
+    def __getstate__(self):
+        # mappingproxy cannot be pickled; ship the compiled matcher as-is
+        state = self.__dict__.copy()
+        state["skills_db"] = dict(self.skills_db)
+        state["aliases"] = dict(self.aliases)
+        return state
+    
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.skills_db = MappingProxyType(state["skills_db"])
+        self.aliases = MappingProxyType(state["aliases"])
 
 class SkillExtractor:
-    def __init__(self):
+    def __init__(self, cache_max_bytes: int = DEFAULT_CACHE_MAX_BYTES, aliases: Mapping[str, str] = None,
+                 fuzzy: bool = DEFAULT_FUZZY):
         # Comprehensive skill dictionaries organized by category
-        self.skills_db = {
+        skills_db = {
             # Programming Languages
             "programming_languages": {
                 "python", "javascript", "typescript", "java", "c++", "c#", "go", "rust", "php", "ruby", 
@@ -83,56 +197,199 @@ class SkillExtractor:
             }
         }
         
-        # Create a flat set of all skills for quick lookup
-        self.all_skills = set()
-        for category_skills in self.skills_db.values():
-            self.all_skills.update(category_skills)
+        # Published dictionary snapshot; readers grab it once per call and
+        # never lock, writers swap in a new snapshot under _update_lock
+        self._snapshot = SkillDictionary(skills_db, DEFAULT_ALIASES if aliases is None else aliases)
+        self._update_lock = threading.Lock()
+        self.fuzzy = fuzzy
+        
+        # Context indicators, matched anywhere inside a word
+        self.context_indicators = [
+            'programming', 'development', 'coding', 'software', 'web', 'mobile', 'data',
+            'database', 'cloud', 'devops', 'testing', 'design', 'analysis'
+        ]
+        self.context_pattern = re.compile('|'.join(map(re.escape, self.context_indicators)))
+        
+        # Results cache keyed by text hash + dictionary version, so entries
+        # computed against an older snapshot never match
+        self.cache = LRUCache(cache_max_bytes)
+    
+    @property
+    def snapshot(self) -> SkillDictionary:
+        """The currently published dictionary snapshot"""
+        return self._snapshot
+    
+    @property
+    def skills_db(self) -> Mapping[str, frozenset]:
+        return self._snapshot.skills_db
+    
+    @property
+    def all_skills(self) -> frozenset:
+        return self._snapshot.all_skills
+    
+    @property
+    def matcher(self) -> SkillMatcher:
+        return self._snapshot.matcher
     
-    def extract_skills(self, text: str) -> List[str]:
+    @property
+    def dictionary_version(self) -> int:
+        return self._snapshot.version
+    
+    def extract_skills(self, text: str, fuzzy: Optional[bool] = None,
+                       include_spans: bool = False) -> Union[List[str], Tuple[List[str], List[Dict[str, Any]]]]:
         """
         Extract skills from resume text using multiple approaches
+        
+        fuzzy overrides the extractor's default for typo-tolerant matching.
+        With include_spans=True, returns (skills, spans) where each span holds
+        the skill, its start/end character offsets in text and the resume
+        section it appears in; spans come from the same matching pass.
         """
         if not text:
-            return []
+            return ([], []) if include_spans else []
         
+        fuzzy = self.fuzzy if fuzzy is None else fuzzy
+        snapshot = self._snapshot
         text_lower = text.lower()
+        cache_key = (hashlib.sha256(text_lower.encode("utf-8")).hexdigest(), snapshot.version, fuzzy)
+        cached = self.cache.get(cache_key)
+        if cached is None:
+            skills, matches = self._extract_skills_uncached(text_lower, snapshot, fuzzy)
+            cached = (tuple(skills), tuple(matches))
+            self.cache.put(cache_key, cached)
+        
+        skills, matches = cached
+        if not include_spans:
+            return list(skills)
+        return list(skills), self._build_spans(text, text_lower, matches)
+    
+    def _build_spans(self, text: str, text_lower: str, matches: Iterable[Match]) -> List[Dict[str, Any]]:
+        """Span dicts for matches in text_lower, with offsets mapped back into text"""
+        section_starts, section_names = self._find_sections(text_lower)
+        origin = None
+        if len(text_lower) != len(text):
+            # Lowercasing expanded some characters (e.g. 'İ' -> 'i̇'): map each
+            # lowered position back to the original character it came from
+            origin = [index for index, char in enumerate(text) for _ in char.lower()]
+            origin.append(len(text))
+        spans = []
+        for start, end, skill in matches:
+            section_index = bisect_right(section_starts, start) - 1
+            section = section_names[section_index] if section_index >= 0 else None
+            if origin is not None:
+                start, end = origin[start], origin[end - 1] + 1
+            spans.append({"skill": skill, "start": start, "end": end, "section": section})
+        return spans
+    
+    def _extract_skills_uncached(self, text_lower: str, snapshot: SkillDictionary,
+                                 fuzzy: bool = False) -> Tuple[List[str], List[Match]]:
+        """
+        Run every extraction method over already-lowercased text
+        
+        Returns the ranked skills and the (start, end, skill) dictionary
+        matches of those skills, ordered by position in text_lower.
+        """
         extracted_skills = set()
         
-        # Method 1: Direct keyword matching
-        direct_matches = self._find_direct_matches(text_lower)
-        extracted_skills.update(direct_matches)
+        # Method 1: Direct keyword and alias matching (single pass)
+        direct_matches = self._find_direct_matches(text_lower, snapshot)
+        if fuzzy:
+            direct_matches += self._find_fuzzy_matches(text_lower, direct_matches, snapshot)
+        direct_matches.sort()
+        extracted_skills.update(skill for _, _, skill in direct_matches)
         
         # Method 2: Pattern-based extraction
-        pattern_matches = self._find_pattern_matches(text_lower)
+        pattern_matches = self._find_pattern_matches(text_lower, snapshot)
         extracted_skills.update(pattern_matches)
         
         # Method 3: Context-based extraction
-        context_matches = self._find_context_matches(text_lower)
+        context_matches = self._find_context_matches(text_lower, snapshot)
         extracted_skills.update(context_matches)
         
-        # Method 4: Abbreviation expansion
-        abbreviation_matches = self._find_abbreviation_matches(text_lower)
-        extracted_skills.update(abbreviation_matches)
-        
         # Clean and normalize skills
         cleaned_skills = self._clean_and_normalize_skills(extracted_skills)
         
-        # Sort by relevance (frequency in text)
-        skill_frequency = self._calculate_skill_frequency(text_lower, cleaned_skills)
-        sorted_skills = sorted(cleaned_skills, key=lambda x: skill_frequency.get(x, 0), reverse=True)
+        # Sort by relevance (frequency in text), ties broken by first appearance
+        skill_frequency = self._calculate_skill_frequency(direct_matches, cleaned_skills)
+        candidates = list(skill_frequency) + sorted(cleaned_skills - skill_frequency.keys())
+        sorted_skills = sorted(candidates, key=lambda x: skill_frequency.get(x, 0), reverse=True)
+        top_skills = sorted_skills[:15]  # Return top 15 most relevant skills
+        
+        # Sections are only looked up when spans are requested
+        selected = set(top_skills)
+        matches = [match for match in direct_matches if match[2] in selected]
         
-        return sorted_skills[:15]  # Return top 15 most relevant skills
+        return top_skills, matches
     
-    def _find_direct_matches(self, text: str) -> Set[str]:
-        """Find direct keyword matches"""
-        matches = set()
-        for skill in self.all_skills:
-            if skill in text:
-                matches.add(skill)
+    def extract_skills_batch(self, texts: Iterable[str], workers: Optional[int] = None,
+                             fuzzy: Optional[bool] = None) -> List[List[str]]:
+        """
+        Extract skills from many texts, spreading the work across processes
+        
+        Each worker process receives this extractor (with its compiled matcher)
+        once at startup. Results are returned in input order.
+        """
+        texts = list(texts)
+        workers = min(workers or os.cpu_count() or 1, len(texts))
+        if workers <= 1:
+            return [self.extract_skills(text, fuzzy) for text in texts]
+        
+        # A few chunks per worker keeps IPC overhead low while balancing load
+        chunksize = max(1, len(texts) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_batch_worker, initargs=(self,)) as executor:
+            return list(executor.map(partial(_extract_in_worker, fuzzy=fuzzy), texts, chunksize=chunksize))
+    
+    def _find_direct_matches(self, text: str, snapshot: Optional[SkillDictionary] = None) -> List[Match]:
+        """
+        Find dictionary skills and their aliases as (start, end, skill) on word boundaries
+        
+        Alias hits are reported under their canonical skill name.
+        """
+        return (snapshot or self._snapshot).matcher.find_all(text)
+    
+    def _find_fuzzy_matches(self, text: str, direct_matches: List[Match],
+                            snapshot: Optional[SkillDictionary] = None) -> List[Match]:
+        """
+        Recover misspelled skills ("kubernets", "java script") from tokens the
+        exact matcher left uncovered, using the snapshot's typo index
+        """
+        snapshot = snapshot or self._snapshot
+        index = snapshot.fuzzy_index
+        
+        covered = bytearray(len(text))
+        for start, end, _ in direct_matches:
+            covered[start:end] = b"\x01" * (end - start)
+        tokens = [
+            (token.start(), token.end(), covered.find(1, token.start(), token.end()) == -1)
+            for token in TOKEN_PATTERN.finditer(text)
+        ]
+        
+        matches = []
+        i = 0
+        while i < len(tokens):
+            start, end, uncovered = tokens[i]
+            
+            # A word split in two ("java script") is a single edit away; the
+            # pair is only worth a lookup if the exact pass missed part of it
+            if i + 1 < len(tokens) and tokens[i + 1][0] == end + 1 and (uncovered or tokens[i + 1][2]):
+                next_end = tokens[i + 1][1]
+                result = index.lookup(text[start:next_end], max_distance=1)
+                if result:
+                    matches.append((start, next_end, result[0]))
+                    i += 2
+                    continue
+            
+            if uncovered:
+                result = index.lookup(text[start:end])
+                if result:
+                    matches.append((start, end, result[0]))
+            i += 1
+        
         return matches
     
-    def _find_pattern_matches(self, text: str) -> Set[str]:
+    def _find_pattern_matches(self, text: str, snapshot: Optional[SkillDictionary] = None) -> Set[str]:
         """Find skills using regex patterns"""
+        all_skills = (snapshot or self._snapshot).all_skills
         matches = set()
         
         # Patterns for common skill mentions
@@ -148,108 +405,65 @@ class SkillExtractor:
             for match in found:
                 # Clean the matched text
                 cleaned = re.sub(r'[^\w\s+#]', '', match).strip()
-                if cleaned in self.all_skills:
+                if cleaned in all_skills:
                     matches.add(cleaned)
         
         return matches
     
-    def _find_context_matches(self, text: str) -> Set[str]:
+    def _find_context_matches(self, text: str, snapshot: Optional[SkillDictionary] = None) -> Set[str]:
         """Find skills based on context clues"""
+        all_skills = (snapshot or self._snapshot).all_skills
         matches = set()
         
-        # Context indicators
-        context_indicators = [
-            'programming', 'development', 'coding', 'software', 'web', 'mobile', 'data',
-            'database', 'cloud', 'devops', 'testing', 'design', 'analysis'
-        ]
-        
-        # Look for skills near context indicators
-        for indicator in context_indicators:
-            if indicator in text:
-                # Find words near the indicator that might be skills
-                words = text.split()
-                for i, word in enumerate(words):
-                    if indicator in word:
-                        # Check surrounding words
-                        for j in range(max(0, i-3), min(len(words), i+4)):
-                            potential_skill = words[j].lower().strip('.,;:!?')
-                            if potential_skill in self.all_skills:
-                                matches.add(potential_skill)
-        
-        return matches
-    
-    def _find_abbreviation_matches(self, text: str) -> Set[str]:
-        """Find skills from common abbreviations"""
-        abbreviation_map = {
-            'js': 'javascript',
-            'ts': 'typescript',
-            'py': 'python',
-            'cpp': 'c++',
-            'csharp': 'c#',
-            'psql': 'postgresql',
-            'my sql': 'mysql',
-            'mongo': 'mongodb',
-            'k8s': 'kubernetes',
-            'k8': 'kubernetes',
-            'tf': 'terraform',
-            'aws s3': 'aws',
-            'aws ec2': 'aws',
-            'aws lambda': 'aws',
-            'gcp cloud': 'gcp',
-            'azure cloud': 'azure',
-            'ml': 'machine learning',
-            'ai': 'artificial intelligence',
-            'ui': 'user interface',
-            'ux': 'user experience',
-            'api': 'rest api',
-            'db': 'database',
-            'sql db': 'sql',
-            'nosql': 'mongodb',
-            'ci/cd': 'ci/cd',
-            'cicd': 'ci/cd'
-        }
+        # Tokenize once and mark the ±3 word window around every indicator
+        # with a difference array, so the cost stays linear in the word count
+        words = text.split()
+        word_count = len(words)
+        window_edges = [0] * (word_count + 1)
+        has_indicator = self.context_pattern.search
+        for i, word in enumerate(words):
+            if has_indicator(word):
+                window_edges[max(0, i - 3)] += 1
+                window_edges[min(word_count, i + 4)] -= 1
         
-        matches = set()
-        for abbrev, full_name in abbreviation_map.items():
-            if abbrev in text and full_name in self.all_skills:
-                matches.add(full_name)
+        # Look up the words that fall inside any window
+        open_windows = 0
+        for i, word in enumerate(words):
+            open_windows += window_edges[i]
+            if open_windows:
+                potential_skill = word.strip('.,;:!?')
+                if potential_skill in all_skills:
+                    matches.add(potential_skill)
         
         return matches
     
     def _clean_and_normalize_skills(self, skills: Set[str]) -> Set[str]:
-        """Clean and normalize extracted skills"""
-        cleaned = set()
+        """
+        Clean extracted skills
         
-        for skill in skills:
-            # Remove common prefixes/suffixes
-            skill = re.sub(r'^(the\s+|a\s+|an\s+)', '', skill)
-            skill = re.sub(r'(\s+and\s+|\s+or\s+|\s+&\s+)', ' ', skill)
-            
-            # Normalize common variations
-            skill = skill.replace('javascript', 'javascript')
-            skill = skill.replace('typescript', 'typescript')
-            skill = skill.replace('python', 'python')
-            skill = skill.replace('react.js', 'react')
-            skill = skill.replace('reactjs', 'react')
-            skill = skill.replace('node.js', 'node.js')
-            skill = skill.replace('nodejs', 'node.js')
-            
-            # Remove extra whitespace
-            skill = ' '.join(skill.split())
-            
-            if skill and len(skill) > 1:
-                cleaned.add(skill)
+        Every method already yields canonical dictionary skills (aliases are
+        resolved by the matcher), so only single-letter skills are dropped.
+        """
+        return {skill for skill in skills if len(skill) > 1}
+    
+    def _calculate_skill_frequency(self, matches: List[Match], skills: Set[str]) -> Dict[str, int]:
+        """
+        Calculate frequency of skills from the direct matching pass
         
-        return cleaned
+        matches must be ordered by start offset; the returned dict then follows
+        first occurrence, so a stable sort on it keeps earlier skills ahead of
+        later ones on ties.
+        """
+        frequency = Counter(skill for _, _, skill in matches)
+        return {skill: count for skill, count in frequency.items() if skill in skills}
     
-    def _calculate_skill_frequency(self, text: str, skills: Set[str]) -> Dict[str, int]:
-        """Calculate frequency of skills in text"""
-        frequency = {}
-        for skill in skills:
-            # Count occurrences (case insensitive)
-            count = len(re.findall(rf'\b{re.escape(skill)}\b', text, re.IGNORECASE))
-            frequency[skill] = count
-        return frequency
+    def _find_sections(self, text: str) -> Tuple[List[int], List[str]]:
+        """Start offsets and names of the recognised section headings in text"""
+        starts, names = [], []
+        for heading in SECTION_PATTERN.finditer(text):
+            starts.append(heading.start(1))
+            names.append(SECTION_HEADINGS[heading.group(1)])
+        return starts, names
     
     def get_skill_categories(self) -> Dict[str, List[str]]:
         """Get skills organized by category"""
@@ -257,11 +471,59 @@ class SkillExtractor:
     
     def add_custom_skill(self, skill: str, category: str = "custom"):
         """Add a custom skill to the database"""
-        if category not in self.skills_db:
-            self.skills_db[category] = set()
+        self.add_custom_skills([(skill, category)])
+    
+    def add_custom_skills(self, skills: Iterable[Tuple[str, str]]) -> int:
+        """
+        Add several (skill, category) pairs and publish them as one new snapshot
         
-        self.skills_db[category].add(skill.lower())
-        self.all_skills.add(skill.lower())
+        Pairs already in the dictionary are skipped, so re-adding is a no-op.
+        In-flight extractions keep using the snapshot they started with.
+        Returns the number of pairs added.
+        """
+        with self._update_lock:
+            snapshot = self._snapshot
+            new_skills = [
+                (skill, category) for skill, category in skills
+                if skill.lower() not in snapshot.skills_db.get(category, ())
+            ]
+            if not new_skills:
+                return 0
+            self._snapshot = snapshot.with_skills(new_skills)
+        
+        # Entries keyed on the old version are unreachable now; free them
+        self.cache.clear()
+        return len(new_skills)
+    
+    def add_aliases(self, aliases: Mapping[str, str]):
+        """Add alias -> canonical skill entries and publish a new snapshot"""
+        if not aliases:
+            return
+        
+        with self._update_lock:
+            self._snapshot = self._snapshot.with_aliases(aliases)
+        
+        self.cache.clear()
+    
+    def __getstate__(self):
+        # Locks cannot be pickled (batch workers receive a copy of the extractor)
+        state = self.__dict__.copy()
+        del state["_update_lock"]
+        return state
+    
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._update_lock = threading.Lock()
+
+# Extractor owned by each extract_skills_batch worker process
+_worker_extractor: Optional[SkillExtractor] = None
+
+def _init_batch_worker(extractor: SkillExtractor):
+    global _worker_extractor
+    _worker_extractor = extractor
+
+def _extract_in_worker(text: str, fuzzy: Optional[bool] = None) -> List[str]:
+    return _worker_extractor.extract_skills(text, fuzzy)
 
 # Global instance
 skill_extractor = SkillExtractor() 
\ No newline at end of file
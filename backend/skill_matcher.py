@@ -0,0 +1,245 @@
+"""
+Multi-pattern skill matching using an Aho-Corasick automaton
+Finds every dictionary skill in a single pass over the text
+"""
+
+from collections import deque
+from typing import Dict, Iterable, List, Mapping, Optional, Set, Tuple, Union
+
+# (start, end, skill) - end is exclusive, offsets index into the scanned text
+Match = Tuple[int, int, str]
+
+# Characters that join word parts into one token ("node.js", "tf-idf", "ci/cd")
+TOKEN_JOINERS = frozenset("./-")
+
+
+def _is_word_char(ch: str) -> bool:
+    """Same notion of a word character as the regex \\w class"""
+    return ch.isalnum() or ch == '_'
+
+
+def _joined_at(text: str, joiner: int, word: int) -> bool:
+    """Whether text[joiner] joins the token to a word character at text[word]"""
+    return 0 <= word < len(text) and text[joiner] in TOKEN_JOINERS and _is_word_char(text[word])
+
+
+class SkillMatcher:
+    """
+    Aho-Corasick automaton over a fixed set of lowercase skill patterns
+
+    Patterns may be given as a mapping of pattern -> canonical skill, so
+    aliases such as "k8s" are reported as the skill they stand for. Aliases
+    only match whole tokens: "js" is found in "js, css" but not in "node.js".
+    """
+
+    def __init__(self, patterns: Union[Iterable[str], Mapping[str, str]]):
+        # Trie stored as parallel lists indexed by node id; node 0 is the root
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        # Per node: (pattern length, skill, is alias) of every pattern ending there
+        self._output: List[Tuple[Tuple[int, str, bool], ...]] = [()]
+
+        pattern_count = 0
+        pending_output: List[List[Tuple[int, str, bool]]] = [[]]
+        if isinstance(patterns, Mapping):
+            pattern_items = patterns.items()
+        else:
+            pattern_items = ((pattern, pattern) for pattern in patterns)
+        for pattern, skill in pattern_items:
+            if not pattern:
+                continue
+            node = 0
+            for ch in pattern:
+                next_node = self._goto[node].get(ch)
+                if next_node is None:
+                    next_node = len(self._goto)
+                    self._goto[node][ch] = next_node
+                    self._goto.append({})
+                    self._fail.append(0)
+                    pending_output.append([])
+                node = next_node
+            if not pending_output[node]:
+                pending_output[node].append((len(pattern), skill, pattern != skill))
+                pattern_count += 1
+
+        self._build_failure_links(pending_output)
+        self._output = [tuple(out) for out in pending_output]
+        self.pattern_count = pattern_count
+
+    def _build_failure_links(self, output: List[List[Tuple[int, str, bool]]]):
+        """Breadth-first construction of failure links and merged outputs"""
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(ch, 0)
+                self._fail[child] = target if target != child else 0
+                output[child].extend(output[self._fail[child]])
+
+    def find_all(self, text: str) -> List[Match]:
+        """
+        Find every pattern occurrence that sits on word boundaries
+
+        Overlapping matches of different skills are all reported (e.g. both
+        "react" and "react native"); when a match is nested inside a longer
+        one for the same skill (e.g. "api" inside "rest api"), only the
+        longer one is kept so frequencies are not double counted. Alias hits
+        joined to the rest of a token by ".", "-" or "/" ("js" in "node.js",
+        "tf" in "tf-idf") or nested inside a longer dictionary match are dropped.
+        """
+        goto = self._goto
+        fail = self._fail
+        output = self._output
+        text_length = len(text)
+
+        matches: List[Match] = []
+        is_alias: List[bool] = []
+        last_match_index: Dict[str, int] = {}
+        node = 0
+        for i, ch in enumerate(text):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if not output[node]:
+                continue
+
+            end = i + 1
+            if end < text_length and _is_word_char(text[end]):
+                continue
+            for length, skill, alias in output[node]:
+                start = end - length
+                if start > 0 and _is_word_char(text[start - 1]):
+                    continue
+                if alias and (_joined_at(text, end, end + 1) or (start > 0 and _joined_at(text, start - 1, start - 2))):
+                    continue
+                previous = last_match_index.get(skill)
+                if previous is not None and start <= matches[previous][0]:
+                    # The new match covers the previous one for this skill
+                    matches[previous] = (start, end, skill)
+                    is_alias[previous] = alias
+                    continue
+                if previous is not None and matches[previous][1] == end:
+                    # Shorter pattern ending at the same place as a longer one
+                    continue
+                last_match_index[skill] = len(matches)
+                matches.append((start, end, skill))
+                is_alias.append(alias)
+
+        if not any(is_alias):
+            return matches
+        dictionary_spans = [(start, end) for (start, end, _), alias in zip(matches, is_alias) if not alias]
+        return [
+            (start, end, skill) for (start, end, skill), alias in zip(matches, is_alias)
+            if not alias or not any(
+                outer_start <= start and end <= outer_end and outer_end - outer_start > end - start
+                for outer_start, outer_end in dictionary_spans
+            )
+        ]
+
+
+def _deletes(term: str, max_distance: int) -> Set[str]:
+    """All strings reachable from term by deleting up to max_distance characters"""
+    variants = {term}
+    frontier = {term}
+    for _ in range(max_distance):
+        frontier = {word[:i] + word[i + 1:] for word in frontier for i in range(len(word))}
+        variants |= frontier
+    return variants
+
+
+def bounded_edit_distance(a: str, b: str, max_distance: int) -> int:
+    """
+    Optimal string alignment distance (edits plus adjacent transpositions)
+
+    Returns max_distance + 1 as soon as the distance is known to exceed the bound.
+    """
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+
+    previous_previous = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if (previous_previous is not None and i > 1 and j > 1
+                    and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]):
+                current[j] = min(current[j], previous_previous[j - 2] + 1)
+        if min(current) > max_distance:
+            return max_distance + 1
+        previous_previous, previous = previous, current
+    return previous[-1]
+
+
+class FuzzySkillIndex:
+    """
+    Symmetric-delete index for typo-tolerant skill lookups
+
+    Every skill is indexed under all of its deletion variants up to
+    max_distance, so a lookup only generates the deletions of the query
+    term and verifies the few candidates that share one.
+    """
+
+    def __init__(self, skills: Iterable[str], max_distance: int = 2, min_length: int = 7,
+                 memo_size: int = 50000):
+        self.max_distance = max_distance
+        self.min_length = min_length
+        self.memo_size = memo_size
+        # Resumes repeat the same vocabulary, so remember recent answers
+        self._memo: Dict[Tuple[str, int], Optional[Tuple[str, int]]] = {}
+        self._variants: Dict[str, Set[str]] = {}
+        for skill in skills:
+            if len(skill) < min_length:
+                continue
+            for variant in _deletes(skill, max_distance):
+                self._variants.setdefault(variant, set()).add(skill)
+
+    def allowed_distance(self, term: str) -> int:
+        """Edit budget for a term: none for short terms, more for longer ones"""
+        if len(term) < self.min_length:
+            return 0
+        return min(self.max_distance, 1 if len(term) < 11 else 2)
+
+    def lookup(self, term: str, max_distance: Optional[int] = None) -> Optional[Tuple[str, int]]:
+        """
+        Closest indexed skill as (skill, distance), or None if out of budget
+
+        max_distance can only tighten the length-based budget.
+        """
+        budget = self.allowed_distance(term)
+        if max_distance is not None:
+            budget = min(budget, max_distance)
+        if not budget:
+            return None
+
+        key = (term, budget)
+        # Single lookup: another thread may clear the memo between a check and a read
+        try:
+            return self._memo[key]
+        except KeyError:
+            pass
+        if len(self._memo) >= self.memo_size:
+            self._memo.clear()
+        result = self._memo[key] = self._lookup(term, budget)
+        return result
+
+    def _lookup(self, term: str, max_distance: int) -> Optional[Tuple[str, int]]:
+        candidates: Set[str] = set()
+        for variant in _deletes(term, max_distance):
+            candidates.update(self._variants.get(variant, ()))
+
+        best = None
+        for skill in candidates:
+            if skill[0] != term[0]:
+                # Typos rarely hit the first letter; skipping these avoids
+                # most false positives against ordinary words
+                continue
+            distance = bounded_edit_distance(term, skill, max_distance)
+            if distance <= max_distance and (best is None or (distance, skill) < best[::-1]):
+                best = (skill, distance)
+        return best
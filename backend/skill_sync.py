@@ -0,0 +1,85 @@
+"""
+Cluster-wide propagation of custom skills
+
+POST /skills stores a skill in the custom_skills table and adds it to the
+worker that handled the request. Every worker runs a CustomSkillWatcher that
+polls the table's row count and latest created_at (one cheap aggregate) and,
+when they change, loads the rows it does not have yet, so all workers extract
+the same skills without restarts.
+"""
+
+import os
+import threading
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+# Seconds between checks for new custom skills
+SKILL_SYNC_INTERVAL = float(os.getenv("SKILL_SYNC_INTERVAL", "5"))
+
+CUSTOM_SKILLS_SIGNATURE_QUERY = "SELECT count(*), max(created_at) FROM custom_skills"
+CUSTOM_SKILLS_QUERY = "SELECT skill, category FROM custom_skills"
+
+
+class CustomSkillWatcher:
+    """
+    Background thread that adds new custom_skills rows to a SkillExtractor
+
+    fetch_signature returns a value that changes whenever rows are added
+    (count and latest created_at); fetch_skills returns every (skill, category)
+    row. The full table is only read when the signature changes.
+    """
+
+    def __init__(self, extractor, fetch_signature: Callable[[], Any],
+                 fetch_skills: Callable[[], Iterable[Tuple[str, str]]], interval: float = SKILL_SYNC_INTERVAL):
+        self.extractor = extractor
+        self.fetch_signature = fetch_signature
+        self.fetch_skills = fetch_skills
+        self.interval = interval
+        self.last_signature: Any = None
+        self.skills_added = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """Start polling (no-op if already running)"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="custom-skill-watcher", daemon=True)
+        self._thread.start()
+        print(f"👀 Watching for new custom skills every {self.interval:g}s")
+
+    def stop(self):
+        """Stop polling and wait for the thread to exit"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 1)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.check_once()
+            except Exception as e:
+                print(f"⚠️ Custom skill check failed: {e}")
+
+    def check_once(self) -> int:
+        """Add custom skills this worker does not have yet; returns how many were added"""
+        signature = self.fetch_signature()
+        if signature == self.last_signature:
+            return 0
+        added = self.extractor.add_custom_skills(self.fetch_skills())
+        # Only recorded after a successful load, so a failed one is retried
+        self.last_signature = signature
+        if added:
+            self.skills_added += added
+            print(f"✅ Loaded {added} new custom skills (dictionary version {self.extractor.dictionary_version})")
+        return added
+
+    def status(self) -> Dict[str, Any]:
+        """Custom skill sync state of this worker"""
+        return {
+            "dictionary_version": self.extractor.dictionary_version,
+            "skills_added": self.skills_added,
+            "interval_seconds": self.interval,
+            "running": self._thread is not None and self._thread.is_alive(),
+        }
@@ -3,9 +3,29 @@
 Test script to debug model prediction issues
 """
 
+import copy
 import joblib
+import json
 import os
-from model_utils import predict_role_with_confidence, predict_role_from_skills
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+import numpy as np
+from model_utils import predict_role_with_confidence, predict_role_from_skills, predict_roles_batch, predict_top_roles, predict_top_roles_batch, explain_role, prediction_cache, reload_model, _predict_queued
+from inference_batcher import InferenceBatcher
+from retrain_jobs import RetrainJobRunner
+from incremental_training import FullRefitRequired, as_incremental, grow_vocabulary
+from training_data import TrainingSetBuilder, parse_skills
+from model_selection import build_estimator, default_candidates, save_estimator_choice, select_model
+from feature_cache import id_fingerprint, load_cached_training_set, load_training_set_cached, merge_training_sets, save_training_set
+from sklearn.preprocessing import MultiLabelBinarizer
+from linear_scorer import LinearScorer
+import model_registry
+from model_registry import ModelRegistry, activate_version, active_version, list_versions, load_version, publish_model, publish_scorer
+from model_artifacts import MappedVocabulary, prune_scorer
+from model_sync import ModelVersionWatcher, publish_active_model
+from export_model import export_model
 
 def test_model():
     print("🔍 Testing Model Predictions\n")
@@ -72,5 +92,556 @@ def test_model():
         if "UI/UX Designer" in [role1, role2]:
             print(f"   🚨 PROBLEM: Predicting UI/UX Designer!")
 
+def test_batch_predictions_match_single():
+    """predict_roles_batch agrees with one-at-a-time predictions, in order"""
+    skill_lists = [
+        ["Python", "Pandas", "NumPy", "Scikit-learn"],
+        ["Docker", "Kubernetes", "AWS", "Terraform"],
+        [],
+        ["Figma", "Sketch", "Adobe XD"],
+    ]
+    batch = predict_roles_batch(skill_lists)
+    
+    print(f"📦 Batch predictions: {batch}")
+    assert len(batch) == len(skill_lists)
+    for skills, (role, confidence) in zip(skill_lists, batch):
+        single_role, single_confidence = predict_role_with_confidence(skills)
+        assert role == single_role == predict_role_from_skills(skills)
+        assert abs(confidence - single_confidence) < 1e-6
+
+def test_linear_scorer_matches_sklearn():
+    """The NumPy scorer reproduces sklearn's predict_proba"""
+    model, mlb = joblib.load("model.pkl")
+    scorer = LinearScorer.from_sklearn(model, mlb)
+    skill_lists = [
+        ["Python", "Pandas", "NumPy"],
+        ["Docker", "Docker", "Kubernetes", "Not A Known Skill"],
+        [],
+        list(mlb.classes_[:20]),
+    ]
+    expected = model.predict_proba(mlb.transform(skill_lists))
+    actual = scorer.predict_proba(skill_lists)
+    
+    print(f"🧮 Max probability difference: {np.abs(expected - actual).max():.2e}")
+    assert np.allclose(expected, actual, atol=1e-5)
+    assert scorer.predict(skill_lists) == list(model.predict(mlb.transform(skill_lists)))
+
+def test_top_roles_are_ranked():
+    """Top-k roles are best first and start with the single prediction"""
+    skills = ["Python", "Pandas", "NumPy", "Scikit-learn"]
+    top_roles = predict_top_roles(skills, k=4)
+    
+    print(f"🏅 Top roles: {top_roles}")
+    assert len(top_roles) == 4
+    assert top_roles[0] == predict_role_with_confidence(skills)
+    scores = [score for _, score in top_roles]
+    assert scores == sorted(scores, reverse=True)
+
+def test_registry_publish_and_swap():
+    """Publishing activates a new version and swaps it in atomically"""
+    model, mlb = joblib.load("model.pkl")
+    with tempfile.TemporaryDirectory() as registry_dir:
+        registry = ModelRegistry(registry_dir)
+        first = registry.publish(model, mlb, {"n_samples": 1})
+        assert registry.active.version == first
+        
+        second = registry.publish(model, mlb, {"n_samples": 2})
+        assert registry.active.version == second
+        assert registry.active.metadata["n_samples"] == 2
+        assert list_versions(registry_dir) == sorted([first, second])
+        print(f"🗂️ Registry status: {registry.status()['active_version']}")
+        
+        # A broken artifact keeps serving the current model and backs off
+        os.remove(os.path.join(registry_dir, second, "model.pkl"))
+        os.remove(os.path.join(registry_dir, second, "weights.npy"))
+        assert not registry.reload()
+        assert registry.active.version == second
+        assert registry.last_error
+        
+        # A version published inactive survives pruning until it is activated
+        keep_versions = model_registry.KEEP_VERSIONS
+        model_registry.KEEP_VERSIONS = 1
+        try:
+            third = publish_model(model, mlb, {"n_samples": 3}, registry_dir, activate=False)
+            assert list_versions(registry_dir) == sorted([second, third])
+            activate_version(third, registry_dir)
+            fourth = publish_model(model, mlb, {"n_samples": 4}, registry_dir)
+            assert list_versions(registry_dir) == [fourth]
+        finally:
+            model_registry.KEEP_VERSIONS = keep_versions
+
+def test_watcher_follows_cluster_version():
+    """A worker's watcher swaps in whatever version the cluster marks active"""
+    model, mlb = joblib.load("model.pkl")
+    with tempfile.TemporaryDirectory() as registry_dir:
+        first = publish_model(model, mlb, {"n_samples": 1}, registry_dir)
+        second = publish_model(model, mlb, {"n_samples": 2}, registry_dir, activate=False)
+        worker = ModelRegistry(registry_dir)
+        assert worker.reload() and worker.active.version == first
+        
+        cluster_version = {"version": second}
+        watcher = ModelVersionWatcher(worker, lambda: cluster_version["version"])
+        assert watcher.check_once() == second
+        assert worker.active.version == second
+        
+        # Database unreachable: fall back to the registry's ACTIVE file
+        def unreachable():
+            raise ConnectionError("database down")
+        watcher.fetch_version = unreachable
+        assert watcher.check_once() == first
+        assert worker.active.version == first
+        
+        # A version that is not on shared storage yet keeps the current model
+        watcher.fetch_version = lambda: "missing-version"
+        watcher.check_once()
+        assert worker.active.version == first
+        print(f"👀 Watcher status: {watcher.status()}")
+        
+        # A failed database write leaves this node on the version the cluster knows
+        class UnreachableConnection:
+            def cursor(self):
+                raise ConnectionError("database down")
+            def rollback(self):
+                pass
+        try:
+            publish_active_model(UnreachableConnection(), model, mlb, {"n_samples": 3}, registry_dir)
+            assert False, "expected the database error to propagate"
+        except ConnectionError:
+            pass
+        assert active_version(registry_dir) == first
+
+def test_mapped_artifacts_match_pickle():
+    """Published versions are served from memory-mapped arrays with identical scores"""
+    model, mlb = joblib.load("model.pkl")
+    with tempfile.TemporaryDirectory() as registry_dir:
+        version = publish_model(model, mlb, registry_dir=registry_dir)
+        loaded = load_version(version, registry_dir)
+        # Backed by the mapped file rather than an owned copy
+        assert not loaded.scorer.weights.flags.owndata
+        assert isinstance(loaded.scorer.vocabulary, MappedVocabulary)
+        
+        reference = LinearScorer.from_sklearn(model, mlb)
+        # Pruning can only drop placeholder and zero-weight features
+        assert len(loaded.scorer.vocabulary) <= len(mlb.classes_)
+        for skill in list(mlb.classes_) + ["not a skill", ""]:
+            if loaded.scorer.vocabulary.get(skill) is None:
+                assert skill not in reference.vocabulary or not reference.weights[reference.vocabulary[skill]].any()
+        
+        skill_lists = [["Python", "Django"], ["React", "JavaScript"], ["Docker", "Kubernetes", "AWS"], []]
+        assert np.allclose(loaded.scorer.predict_proba(skill_lists), reference.predict_proba(skill_lists))
+        assert list(loaded.classes) == list(model.classes_)
+        # The pickle is only read on demand, and holds the same pruned features
+        assert loaded.model.classes_.tolist() == model.classes_.tolist()
+        assert list(loaded.mlb.classes_) == sorted(skill for skill in mlb.classes_ if loaded.scorer.vocabulary.get(skill) is not None)
+    
+    # With a placeholder feature, the pickled (MODEL_MMAP=0) and mapped paths still agree
+    coef = np.hstack([model.coef_, model.coef_[:, :1]])
+    padded = copy.deepcopy(model)
+    padded.coef_, padded.n_features_in_ = coef, coef.shape[1]
+    padded_mlb = MultiLabelBinarizer(classes=list(mlb.classes_) + ["Sample Skill"]).fit([])
+    with tempfile.TemporaryDirectory() as registry_dir:
+        loaded = load_version(publish_model(padded, padded_mlb, registry_dir=registry_dir), registry_dir)
+        skill_lists = [["Python", "Sample Skill"], ["React"]]
+        assert "Sample Skill" not in loaded.mlb.classes_
+        assert np.allclose(loaded.scorer.predict_proba(skill_lists),
+                           loaded.model.predict_proba(loaded.mlb.transform(skill_lists)))
+
+def test_prediction_cache():
+    """Equivalent skill sets share one cached prediction until the model is swapped"""
+    prediction_cache.clear()
+    before = prediction_cache.stats()
+    first = predict_top_roles(["Python", "Django", "Python"])
+    second = predict_top_roles(["Django", "Python"])
+    after = prediction_cache.stats()
+    assert first == second
+    assert after["misses"] - before["misses"] == 1
+    assert after["hits"] - before["hits"] == 1
+    print(f"🧠 Prediction cache: {after}")
+    
+    reload_model()
+    assert len(prediction_cache) == 0
+
+def test_inference_batcher():
+    """Concurrent submissions are flushed together and each caller gets its own result"""
+    batch_sizes = []
+    def square_all(items):
+        batch_sizes.append(len(items))
+        return [item * item for item in items]
+    
+    batcher = InferenceBatcher(square_all, max_batch_size=8, max_wait=0.05)
+    futures = [batcher.submit(i) for i in range(20)]
+    assert [future.result(timeout=5) for future in futures] == [i * i for i in range(20)]
+    assert max(batch_sizes) <= 8 and len(batch_sizes) < 20
+    
+    # Real predictions through the queue match direct scoring, each trimmed to its own k
+    batcher = InferenceBatcher(_predict_queued, max_batch_size=8, max_wait=0.01)
+    requests = [(["Python", "Django"], 1), (["React", "JavaScript"], 3), (["Docker", "AWS"], 2)]
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        results = list(pool.map(batcher.predict, requests))
+    for (skills, k), result in zip(requests, results):
+        expected = predict_top_roles_batch([skills], k)[0]
+        assert [role for role, _ in result] == [role for role, _ in expected]
+        assert np.allclose([p for _, p in result], [p for _, p in expected])
+    print(f"📦 Batcher stats: {batcher.stats()}")
+    
+    # A failing batch fails every caller in it
+    def fail(items):
+        raise ValueError("boom")
+    try:
+        InferenceBatcher(fail).predict(1, timeout=5)
+        assert False, "expected the batch error to propagate"
+    except ValueError:
+        pass
+    
+    # Too few results must not leave callers waiting forever
+    short = InferenceBatcher(lambda items: items[:-1], max_batch_size=4, max_wait=0.05)
+    futures = [short.submit(i) for i in range(4)]
+    for future in futures:
+        try:
+            future.result(timeout=5)
+            assert False, "expected a result count error"
+        except ValueError:
+            pass
+
+def test_compact_export():
+    """Exported versions drop dead and placeholder features but score the same"""
+    model, mlb = joblib.load("model.pkl")
+    scorer = LinearScorer.from_sklearn(model, mlb)
+    dead = np.zeros_like(scorer.weights[:1])
+    padded = LinearScorer.from_weights(
+        {**scorer.vocabulary, "Sample Skill": scorer.n_features, "Unused Skill": scorer.n_features + 1},
+        np.vstack([scorer.weights, scorer.weights[:1], dead]), scorer.intercept, scorer.classes, scorer.multinomial,
+    )
+    compact = prune_scorer(padded)
+    assert compact.n_features == scorer.n_features
+    assert "Sample Skill" not in compact.vocabulary and "Unused Skill" not in compact.vocabulary
+    assert sorted(compact.vocabulary.values()) == list(range(compact.n_features))
+    
+    with tempfile.TemporaryDirectory() as registry_dir:
+        version = publish_scorer(compact, registry_dir=registry_dir)
+        loaded = load_version(version, registry_dir)
+        assert loaded.model is None
+        skill_lists = [["Python", "Django"], ["React", "Sample Skill"], []]
+        assert np.allclose(loaded.scorer.predict_proba(skill_lists), scorer.predict_proba([["Python", "Django"], ["React"], []]))
+        
+        # Exports are activated through the database, so watchers keep serving them
+        class VersionsConnection:
+            active = None
+            def cursor(self):
+                connection = self
+                class Cursor:
+                    def __enter__(self):
+                        return self
+                    def __exit__(self, *exc):
+                        return False
+                    def execute(self, query, params):
+                        if query.lstrip().startswith("INSERT"):
+                            connection.active = params[0]
+                return Cursor()
+            def commit(self):
+                pass
+        conn = VersionsConnection()
+        trained = publish_model(model, mlb, registry_dir=registry_dir)
+        inactive = export_model("model.pkl", registry_dir=registry_dir)["version"]
+        assert active_version(registry_dir) == trained
+        exported = export_model("model.pkl", registry_dir=registry_dir, conn=conn)["version"]
+        assert exported != inactive and conn.active == exported == active_version(registry_dir)
+        worker = ModelRegistry(registry_dir)
+        assert ModelVersionWatcher(worker, lambda: conn.active).check_once() == exported
+        assert worker.active.version == exported
+
+def test_explanations():
+    """Explanations rank the active skills by their weight for the predicted role"""
+    skills = ["Python", "Django", "PostgreSQL", "React", "Photoshop", "not a skill"]
+    role, _ = predict_role_with_confidence(skills)
+    explanation = explain_role(skills, role, top_n=3)
+    assert explanation["role"] == role
+    supporting = [item["weight"] for item in explanation["supporting"]]
+    opposing = [item["weight"] for item in explanation["opposing"]]
+    assert supporting == sorted(supporting, reverse=True) and all(weight > 0 for weight in supporting)
+    assert opposing == sorted(opposing) and all(weight < 0 for weight in opposing)
+    assert len(supporting) <= 3 and len(opposing) <= 3
+    explained = {item["skill"] for item in explanation["supporting"] + explanation["opposing"]}
+    assert explained <= set(skills) - {"not a skill"}
+    print(f"💡 Why {role}: {explanation}")
+    
+    assert explain_role(skills, "Not A Role") is None
+    
+    # A pinned model version is used for both scoring and explaining
+    model, mlb = joblib.load("model.pkl")
+    with tempfile.TemporaryDirectory() as registry_dir:
+        pinned = load_version(publish_model(model, mlb, registry_dir=registry_dir, activate=False), registry_dir)
+        pinned_role, _ = predict_top_roles(skills, 1, loaded=pinned)[0]
+        pinned_explanation = explain_role(skills, pinned_role, loaded=pinned)
+        assert pinned_explanation["model_version"] == pinned.version
+
+def _fake_retrain(progress):
+    """Stand-in for retrain_model, run in the job's child process"""
+    progress("training", n_samples=42)
+    time.sleep(0.5)
+    return "fake-version"
+
+def _failing_retrain(progress):
+    raise RuntimeError("no database")
+
+def test_retrain_jobs():
+    """Retrains run in a child process, report progress and deduplicate"""
+    completed = []
+    runner = RetrainJobRunner(_fake_retrain, on_complete=completed.append)
+    job, deduplicated = runner.submit()
+    again, joined = runner.submit()
+    assert not deduplicated and joined and again["job_id"] == job["job_id"]
+    
+    finished = runner.wait(job["job_id"], timeout=60)
+    assert finished["status"] == "succeeded", finished
+    assert finished["model_version"] == "fake-version" and finished["n_samples"] == 42
+    assert finished["duration_seconds"] > 0 and completed == ["fake-version"]
+    print(f"🔁 Retrain job: {finished}")
+    
+    failing = RetrainJobRunner(_failing_retrain)
+    job, _ = failing.submit()
+    failed = failing.wait(job["job_id"], timeout=60)
+    assert failed["status"] == "failed" and "no database" in failed["error"]
+    
+    # Workers sharing a state directory join and report each other's jobs
+    with tempfile.TemporaryDirectory() as state_dir:
+        first = RetrainJobRunner(_fake_retrain, state_dir=state_dir)
+        second = RetrainJobRunner(_fake_retrain, state_dir=state_dir)
+        job, _ = first.submit()
+        other, joined = second.submit()
+        assert joined and other["job_id"] == job["job_id"]
+        finished = second.wait(job["job_id"], timeout=60)
+        assert finished["status"] == "succeeded" and finished["model_version"] == "fake-version"
+        
+        # A running job whose worker died is reported as failed
+        stale = RetrainJobRunner(_fake_retrain, state_dir=state_dir, stale_after=0.0)
+        with open(os.path.join(state_dir, f"{'0' * 32}.json"), "w") as f:
+            json.dump({**finished, "job_id": "0" * 32, "status": "running", "heartbeat_at": "2000-01-01T00:00:00"}, f)
+        assert stale.get("0" * 32)["status"] == "failed"
+        assert not stale.submit()[1]
+        stale.wait(stale._current, timeout=60)
+
+def test_incremental_training():
+    """A fitted model continues with partial_fit on new skills without losing its weights"""
+    model, mlb = joblib.load("model.pkl")
+    clf = as_incremental(copy.deepcopy(model), n_samples_seen=100)
+    # Same model, same (softmax) loss: nothing moves before an update
+    known = mlb.transform([["Python", "Django"], ["React", "CSS"], []])
+    assert np.allclose(clf.predict_proba(known), model.predict_proba(known))
+    skill_lists = [["Python", "Django", "Brand New Framework"], ["React", "Another New Tool"]]
+    grown = grow_vocabulary(clf, mlb, skill_lists)
+    assert len(grown.classes_) == len(mlb.classes_) + 2
+    assert clf.coef_.shape == (len(model.classes_), len(grown.classes_))
+    
+    # Existing skills keep their weights, new ones start at zero
+    old = LinearScorer.from_sklearn(model, mlb)
+    seeded = LinearScorer.from_sklearn(clf, grown)
+    assert np.allclose(seeded.weights[seeded.vocabulary["Python"]], old.weights[old.vocabulary["Python"]])
+    assert not seeded.weights[seeded.vocabulary["Brand New Framework"]].any()
+    
+    before = clf.predict_proba(grown.transform(skill_lists))
+    clf.partial_fit(grown.transform(skill_lists), ["Backend Developer", "Frontend Developer"])
+    after = clf.predict_proba(grown.transform(skill_lists))
+    backend, frontend = (list(clf.classes_).index(role) for role in ("Backend Developer", "Frontend Developer"))
+    assert after[0, backend] > before[0, backend] and after[1, frontend] > before[1, frontend]
+    updated = LinearScorer.from_sklearn(clf, grown)
+    assert updated.weights[updated.vocabulary["Brand New Framework"]].any()
+    assert np.allclose(updated.predict_proba(skill_lists), clf.predict_proba(grown.transform(skill_lists)))
+    assert updated.predict([["Python", "Django"]]) == ["Backend Developer"]
+
+def test_training_set_matches_binarizer():
+    """Streamed chunks build the same matrix MultiLabelBinarizer.fit_transform would"""
+    rows = [
+        (["Python", "Django", "Python"], "Backend Developer"),
+        ("['React', 'CSS']", "Frontend Developer"),
+        ([], "Backend Developer"),
+        (None, "Data Analyst"),
+        (["SQL", "Python"], "Data Analyst"),
+        (["CSS"], "Frontend Developer"),
+    ]
+    builder = TrainingSetBuilder()
+    for chunk in (rows[:2], rows[2:5], rows[5:]):
+        builder.add_rows(chunk)
+    data = builder.build()
+    
+    kept = [(parse_skills(skills), role) for skills, role in rows if parse_skills(skills)]
+    mlb = MultiLabelBinarizer()
+    expected = mlb.fit_transform([skills for skills, _ in kept])
+    assert data.skipped == 2 and data.n_samples == len(kept)
+    assert list(data.skills) == list(mlb.classes_)
+    assert (data.X.toarray() == expected).all()
+    assert list(data.y) == [role for _, role in kept]
+    assert list(data.binarizer().transform([["Python", "CSS"]])[0]) == list(mlb.transform([["Python", "CSS"]])[0])
+    
+    # Columns can be mapped into a grown vocabulary
+    superset = sorted(set(data.skills) | {"AWS", "Go"})
+    grown = MultiLabelBinarizer(classes=superset).fit([])
+    assert (data.reindex(superset).toarray() == grown.transform([skills for skills, _ in kept])).all()
+
+def test_feature_cache_appends_delta():
+    """A cached training set plus newer rows equals a fresh build of the current table"""
+    def build(rows):
+        builder = TrainingSetBuilder(with_ids=True)
+        builder.add_rows(rows)
+        return builder.build()
+    
+    cached_rows = [
+        ("r1", ["Python", "Django"], "Backend Developer"),
+        ("r2", ["React", "CSS"], "Frontend Developer"),
+        ("r3", ["SQL"], "Data Analyst"),
+    ]
+    # r2 is re-confirmed with a new role; r4 brings new skills
+    delta_rows = [
+        ("r2", ["React", "CSS"], "Full Stack Developer"),
+        ("r4", ["Go", "Kubernetes", "Python"], "Backend Developer"),
+    ]
+    with tempfile.TemporaryDirectory() as cache_dir:
+        assert load_cached_training_set(cache_dir) is None
+        save_training_set(build(cached_rows), "2026-01-01T00:00:00", cache_dir)
+        cached, metadata = load_cached_training_set(cache_dir)
+        assert metadata["watermark"] == "2026-01-01T00:00:00" and cached.n_samples == 3
+        
+        merged = merge_training_sets(cached, build(delta_rows))
+        save_training_set(merged, "2026-01-02T00:00:00", cache_dir)
+        reloaded, _ = load_cached_training_set(cache_dir)
+    
+    current = {row_id: (skills, role) for row_id, skills, role in cached_rows + delta_rows}
+    fresh = build([(row_id, skills, role) for row_id, (skills, role) in current.items()])
+    assert list(reloaded.skills) == list(fresh.skills)
+    
+    def rows_by_id(data):
+        dense = data.X.toarray()
+        return {row_id: (tuple(dense[i]), data.y[i]) for i, row_id in enumerate(data.ids)}
+    assert rows_by_id(reloaded) == rows_by_id(fresh)
+    assert dict(zip(reloaded.ids, reloaded.y))["r2"] == "Full Stack Developer"
+
+class _FakeResumesConnection:
+    """Just enough of a psycopg2 connection to serve the training-cache queries"""
+    
+    def __init__(self):
+        self.now = datetime(2026, 1, 1)
+        self.rows = {}  # id -> (skills, role, confirmed_at)
+        self.full_scans = 0
+    
+    def confirm(self, row_id, skills, role):
+        self.now += timedelta(minutes=1)
+        self.rows[row_id] = (skills, role, self.now)
+    
+    def cursor(self, name=None):
+        connection = self
+        
+        class Cursor:
+            def __enter__(self):
+                return self
+            def __exit__(self, *exc):
+                return False
+            def execute(self, query, params=None):
+                trainable = [(row_id, skills, role, at) for row_id, (skills, role, at) in connection.rows.items()]
+                if "LOCALTIMESTAMP" in query:
+                    self.result = [(connection.now,)]
+                elif "count(*)" in query:
+                    ids = [row_id for row_id, skills, _, _ in trainable if skills]
+                    self.result = [(len(ids), id_fingerprint(ids))]
+                elif params and "watermark" in params:
+                    watermark = datetime.fromisoformat(params["watermark"])
+                    self.result = [(row_id, skills, role) for row_id, skills, role, at in trainable if at > watermark]
+                else:
+                    connection.full_scans += 1
+                    self.result = [(row_id, skills, role) for row_id, skills, role, _ in trainable]
+            def fetchone(self):
+                return self.result[0]
+            def fetchmany(self, size):
+                chunk, self.result = self.result[:size], self.result[size:]
+                return chunk
+        return Cursor()
+
+def test_cached_loading_rebuilds_when_rows_disappear():
+    """Deleted rows are noticed even when a new confirmation keeps the row count equal"""
+    conn = _FakeResumesConnection()
+    conn.confirm("r1", ["Python", "Django"], "Backend Developer")
+    conn.confirm("r2", ["React", "CSS"], "Frontend Developer")
+    with tempfile.TemporaryDirectory() as cache_dir:
+        data, _ = load_training_set_cached(conn, cache_dir)
+        assert data.n_samples == 2 and conn.full_scans == 1
+        
+        conn.confirm("r3", ["SQL"], "Data Analyst")
+        data, _ = load_training_set_cached(conn, cache_dir)
+        assert sorted(data.ids) == ["r1", "r2", "r3"] and conn.full_scans == 1
+        
+        # Same count, different rows: the fingerprint forces a rebuild
+        del conn.rows["r1"]
+        conn.confirm("r4", ["Go"], "Backend Developer")
+        data, _ = load_training_set_cached(conn, cache_dir)
+        assert sorted(data.ids) == ["r2", "r3", "r4"] and conn.full_scans == 2
+        
+        # An expired cache is rebuilt regardless
+        load_training_set_cached(conn, cache_dir, max_age_days=0)
+        assert conn.full_scans == 3
+
+def test_model_selection_respects_latency_budget():
+    """CV report covers every candidate and only a model within budget is selected"""
+    profiles = {
+        "Backend Developer": ["Python", "Django", "PostgreSQL", "Docker"],
+        "Frontend Developer": ["React", "CSS", "JavaScript", "HTML"],
+        "Data Analyst": ["SQL", "Excel", "Tableau", "Python"],
+    }
+    rng = np.random.RandomState(0)
+    builder = TrainingSetBuilder()
+    builder.add_rows(
+        (list(rng.choice(skills, 3, replace=False)), role)
+        for _ in range(12) for role, skills in profiles.items()
+    )
+    data = builder.build()
+    candidates = default_candidates((1.0,))
+    
+    report = select_model(data, candidates, folds=3, latency_budget_ms=1000.0, n_jobs=2, latency_repeat=20)
+    results = report["results"]
+    assert set(results) == {name for name, _ in candidates}
+    for result in results.values():
+        assert 0.0 <= result["accuracy_mean"] <= 1.0 and result["folds"] == 3
+        assert result["artifact_bytes"] > 0 and result["latency_ms"]["p95"] >= result["latency_ms"]["p50"]
+    assert report["selected"] in results and report["selected"] != "random_forest"
+    # Non-linear models are reported but never promoted, nor trained incrementally
+    assert not results["random_forest"]["promotable"] and results[report["selected"]]["promotable"]
+    try:
+        as_incremental(report["models"]["random_forest"], data.n_samples)
+        assert False, "expected a full re-fit to be required"
+    except FullRefitRequired:
+        pass
+    assert report["models"][report["selected"]].predict(data.X[:1]).shape == (1,)
+    
+    # A promoted choice is what later full fits build
+    with tempfile.TemporaryDirectory() as registry_dir:
+        default, name = build_estimator(registry_dir)
+        assert name == "default" and type(default).__name__ == "LogisticRegression"
+        save_estimator_choice("logistic_regression(C=0.1)", default_candidates((0.1,))[0][1], registry_dir)
+        chosen, name = build_estimator(registry_dir)
+        assert name == "logistic_regression(C=0.1)" and chosen.C == 0.1 and chosen.max_iter == 1000
+        try:
+            save_estimator_choice("random_forest", report["models"]["random_forest"], registry_dir)
+            assert False, "expected non-linear estimators to be rejected"
+        except ValueError:
+            pass
+    
+    # Nothing fits an impossible budget, so nothing would be promoted
+    strict = select_model(data, candidates[:1], folds=3, latency_budget_ms=0.0, n_jobs=1, latency_repeat=5)
+    assert strict["selected"] is None and not strict["results"][candidates[0][0]]["within_budget"]
+
 if __name__ == "__main__":
-    test_model() 
\ No newline at end of file
+    test_model()
+    test_batch_predictions_match_single()
+    test_linear_scorer_matches_sklearn()
+    test_top_roles_are_ranked()
+    test_registry_publish_and_swap()
+    test_watcher_follows_cluster_version()
+    test_mapped_artifacts_match_pickle()
+    test_prediction_cache()
+    test_inference_batcher()
+    test_compact_export()
+    test_explanations()
+    test_retrain_jobs()
+    test_incremental_training()
+    test_training_set_matches_binarizer()
+    test_feature_cache_appends_delta()
+    test_cached_loading_rebuilds_when_rows_disappear()
+    test_model_selection_respects_latency_budget()
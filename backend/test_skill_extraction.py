@@ -3,7 +3,9 @@
 Test script to demonstrate the improved skill extraction
 """
 
-from skill_extractor import skill_extractor
+from skill_extractor import SkillExtractor, skill_extractor
+from skill_matcher import SkillMatcher
+from skill_sync import CustomSkillWatcher
 
 def test_skill_extraction():
     # Test cases with different types of resume text
@@ -85,5 +87,131 @@ def test_skill_extraction():
     
     print(f"\n🎯 Total unique skills available: {len(skill_extractor.all_skills)}")
 
+def test_direct_match_word_boundaries():
+    """Dictionary skills must not match inside other words"""
+    text = "worked on regression and progress reports using go, react native and c++"
+    matches = skill_extractor._find_direct_matches(text)
+    found = {skill for _, _, skill in matches}
+    
+    print(f"🔎 Direct matches: {sorted(found)}")
+    assert {"go", "react", "react native", "c++"} <= found
+    assert "less" not in found and "r" not in found
+    for start, end, skill in matches:
+        assert text[start:end] == skill
+
+def test_batch_extraction_matches_serial():
+    """Batch extraction returns the same skills as one-at-a-time calls, in order"""
+    texts = [
+        "Proficient in Python, pandas and numpy for data analysis",
+        "Built web apps with React, Node.js and PostgreSQL",
+        "",
+        "DevOps work with Docker, Kubernetes and Terraform on AWS",
+    ]
+    results = skill_extractor.extract_skills_batch(texts, workers=2)
+    
+    print(f"📦 Batch results: {results}")
+    assert results == [skill_extractor.extract_skills(text) for text in texts]
+
+def test_extraction_cache_invalidation():
+    """Repeated texts hit the cache; adding a skill bumps the dictionary version"""
+    extractor = SkillExtractor()
+    text = "Skills: Python, Docker and Zig"
+    
+    first = extractor.extract_skills(text)
+    second = extractor.extract_skills(text.upper())
+    assert first == second
+    assert extractor.cache.stats()["hits"] == 1
+    
+    extractor.add_custom_skill("Zig")
+    assert extractor.dictionary_version == 1
+    assert "zig" in extractor.extract_skills(text)
+    print(f"🗃️ Cache stats: {extractor.cache.stats()}")
+    
+    # Re-adding a known skill keeps the snapshot (and the cache) as it is
+    assert extractor.add_custom_skills([("zig", "custom")]) == 0
+    assert extractor.dictionary_version == 1
+
+def test_alias_resolution_on_token_boundaries():
+    """Aliases resolve to canonical skills but never match inside words"""
+    text = "deployed with k8s and wrote JS tests; attempts to maintain dashboards via a REST API"
+    matches = skill_extractor._find_direct_matches(text.lower())
+    found = [skill for _, _, skill in matches]
+    
+    print(f"🔤 Alias matches: {found}")
+    assert "kubernetes" in found and "javascript" in found
+    assert "typescript" not in found
+    assert found.count("rest api") == 1
+    
+    # Aliases inside dotted or hyphenated tokens are part of another name
+    skills = skill_extractor.extract_skills("Built services with Node.js and Next.js; ranked by tf-idf, profiled with py-spy")
+    print(f"🔤 Joined tokens: {skills}")
+    assert "javascript" not in skills and "terraform" not in skills and "python" not in skills
+    assert skills[:2] == ["node.js", "next.js"]
+    
+    # An alias nested in a longer dictionary skill is not counted again
+    matcher = SkillMatcher({"machine learning": "machine learning", "learning": "e-learning"})
+    assert matcher.find_all("machine learning and learning") == [(0, 16, "machine learning"), (21, 29, "e-learning")]
+
+def test_fuzzy_matching_recovers_typos():
+    """Fuzzy mode recovers near-miss spellings that exact matching drops"""
+    text = "Deployed services on Kubernets backed by PostgresSQL, frontend in Java Script"
+    exact = skill_extractor.extract_skills(text, fuzzy=False)
+    fuzzy = skill_extractor.extract_skills(text, fuzzy=True)
+    
+    print(f"🩹 Exact: {exact}")
+    print(f"🩹 Fuzzy: {fuzzy}")
+    assert "kubernetes" not in exact
+    assert {"kubernetes", "postgresql", "javascript"} <= set(fuzzy)
+
+def test_spans_report_offsets_and_sections():
+    """Spans point at the matched text and carry the section they appear in"""
+    text = "Summary\nBackend engineer.\nSkills: Python, K8s\nExperience\nBuilt APIs with FastAPI"
+    skills, spans = skill_extractor.extract_skills(text, include_spans=True)
+    
+    print(f"📍 Spans: {spans}")
+    assert skills == skill_extractor.extract_skills(text)
+    by_skill = {span["skill"]: span for span in spans}
+    assert text[by_skill["python"]["start"]:by_skill["python"]["end"]] == "Python"
+    assert text[by_skill["kubernetes"]["start"]:by_skill["kubernetes"]["end"]] == "K8s"
+    assert by_skill["python"]["section"] == "skills"
+    assert by_skill["fastapi"]["section"] == "experience"
+    
+    # Lowercasing 'İ' adds a character; offsets must still index the original text
+    text = "İİ Developer. Skills: Python and Docker"
+    _, spans = skill_extractor.extract_skills(text, include_spans=True)
+    by_skill = {span["skill"]: span for span in spans}
+    assert text[by_skill["python"]["start"]:by_skill["python"]["end"]] == "Python"
+    assert text[by_skill["docker"]["start"]:by_skill["docker"]["end"]] == "Docker"
+
+def test_custom_skills_reach_every_worker():
+    """A skill stored by one worker is picked up by the others' watchers"""
+    table = [("zig", "custom")]
+    queries = []
+    def fetch_skills():
+        queries.append("rows")
+        return list(table)
+    
+    worker = SkillExtractor()
+    watcher = CustomSkillWatcher(worker, lambda: len(table), fetch_skills)
+    assert watcher.check_once() == 1
+    assert "zig" in worker.extract_skills("Systems work in Zig")
+    
+    # Unchanged table: only the signature is read
+    assert watcher.check_once() == 0 and queries == ["rows"]
+    
+    # Another worker stores a skill; this one extracts it after the next poll
+    table.append(("bun", "custom"))
+    assert "bun" not in worker.extract_skills("Scripts run on Bun")
+    assert watcher.check_once() == 1
+    assert "bun" in worker.extract_skills("Scripts run on Bun")
+    print(f"👀 Skill watcher status: {watcher.status()}")
+
 if __name__ == "__main__":
-    test_skill_extraction() 
\ No newline at end of file
+    test_skill_extraction()
+    test_direct_match_word_boundaries()
+    test_batch_extraction_matches_serial()
+    test_extraction_cache_invalidation()
+    test_alias_resolution_on_token_boundaries()
+    test_fuzzy_matching_recovers_typos()
+    test_spans_report_offsets_and_sections() 
+    test_custom_skills_reach_every_worker()
@@ -1,78 +1,57 @@
 # train_model.py
 import os
-import joblib
 import psycopg2
-import pandas as pd
 from dotenv import load_dotenv
-from sklearn.preprocessing import MultiLabelBinarizer
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.linear_model import LogisticRegression
+from model_selection import build_estimator
+from model_sync import acquire_training_lock, publish_active_model
+from training_data import load_training_set
 
 load_dotenv()
 DATABASE_URL = os.getenv("DATABASE_URL").replace("postgresql+psycopg2", "postgresql")
 
+# Confirmed resumes, plus one placeholder row for every active role without any
+TRAINING_QUERY = """
+    SELECT r.extracted_skills, r.confirmed_role 
+    FROM resumes r 
+    WHERE r.confirmed_role IS NOT NULL
+    UNION ALL
+    SELECT ARRAY['Sample Skill'] as extracted_skills, ro.name as confirmed_role
+    FROM roles ro
+    WHERE ro.is_active = TRUE
+    AND ro.name NOT IN (SELECT DISTINCT confirmed_role FROM resumes WHERE confirmed_role IS NOT NULL)
+"""
+
 def train():
     conn = psycopg2.connect(DATABASE_URL)
+    # Never publish concurrently with a running retrain
+    acquire_training_lock(conn)
     
     # Get training data from resumes with confirmed roles
     # Also include roles from the roles table as fallback
-    df = pd.read_sql("""
-        SELECT r.extracted_skills, r.confirmed_role 
-        FROM resumes r 
-        WHERE r.confirmed_role IS NOT NULL
-        UNION ALL
-        SELECT ARRAY['Sample Skill'] as extracted_skills, ro.name as confirmed_role
-        FROM roles ro
-        WHERE ro.is_active = TRUE
-        AND ro.name NOT IN (SELECT DISTINCT confirmed_role FROM resumes WHERE confirmed_role IS NOT NULL)
-    """, conn)
+    # Rows are streamed from a server-side cursor into a sparse matrix
+    data = load_training_set(conn, TRAINING_QUERY)
 
-    if df.empty:
-        print("No training data found.")
+    if data.n_samples == 0:
+        print("No training data found." if not data.skipped else "No records with valid skills found.")
+        conn.close()
         return
 
-    # Debug: Check the data format
-    print(f"📊 Found {len(df)} records for training")
-    print(f"📈 Sample skills format: {df['extracted_skills'].iloc[0]} (type: {type(df['extracted_skills'].iloc[0])})")
-    
-    # Ensure skills are in the correct format (list of strings)
-    # PostgreSQL arrays might be read as strings or other formats
-    def normalize_skills(skills):
-        if skills is None:
-            return []
-        if isinstance(skills, str):
-            # If it's a string, try to parse it
-            import ast
-            try:
-                return ast.literal_eval(skills)
-            except:
-                return [skills]
-        elif isinstance(skills, list):
-            return skills
-        else:
-            return [str(skills)]
-    
-    df['extracted_skills'] = df['extracted_skills'].apply(normalize_skills)
+    print(f"📊 Found {data.n_samples} records for training ({data.skipped} without skills skipped)")
     
-    # Filter out empty skill lists
-    df = df[df['extracted_skills'].apply(len) > 0]
-    
-    if df.empty:
-        print("No records with valid skills found.")
-        return
-
-    mlb = MultiLabelBinarizer()
-    X = mlb.fit_transform(df["extracted_skills"])
-    y = df["confirmed_role"]
+    mlb = data.binarizer()
+    X = data.X
+    y = data.y
 
-    # Use LogisticRegression for better probability estimates
-    # RandomForest can also output probabilities but LogisticRegression is more calibrated
-    clf = LogisticRegression(random_state=42, max_iter=1000)
+    # LogisticRegression for better probability estimates, unless select_model.py
+    # has promoted another candidate (it compares several, RandomForest included)
+    clf, estimator_name = build_estimator()
     clf.fit(X, y)
 
-    joblib.dump((clf, mlb), "model.pkl")
-    print("✅ Model trained and saved as model.pkl")
-    print(f"✅ Trained on {len(df)} samples with {len(clf.classes_)} classes")
+    metadata = {"n_samples": data.n_samples, "trainer": "train_model", "estimator": estimator_name}
+    version = publish_active_model(conn, clf, mlb, metadata)
+    conn.close()
+    print(f"✅ Model trained and published as version {version}")
+    print(f"✅ Trained on {data.n_samples} samples with {len(clf.classes_)} classes")
 
 if __name__ == "__main__":
     train()
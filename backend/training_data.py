@@ -0,0 +1,189 @@
+"""
+Streaming loader for (skills, role) training data
+Reads rows in chunks from a server-side cursor and builds a sparse CSR skill
+matrix incrementally, so memory stays flat however many resumes there are
+"""
+
+import ast
+import uuid
+from array import array
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+from scipy import sparse
+from sklearn.preprocessing import MultiLabelBinarizer
+
+# Rows fetched from the server per round trip
+CHUNK_SIZE = 10000
+
+CONFIRMED_RESUMES_QUERY = "SELECT extracted_skills, confirmed_role FROM resumes WHERE confirmed_role IS NOT NULL"
+
+
+def database_time(conn) -> str:
+    """
+    Current database time as an ISO string, taken before reading training data
+
+    Used as a watermark: everything confirmed before it is in the read, and
+    /confirm-role stamps confirmed_at with the same clock.
+    """
+    with conn.cursor() as cur:
+        cur.execute("SELECT LOCALTIMESTAMP")
+        return cur.fetchone()[0].isoformat()
+
+
+def parse_skills(skills) -> List[str]:
+    """
+    Skills of one row as a list
+
+    psycopg2 already returns TEXT[] columns as lists; strings (e.g. arrays
+    stored as text by older code) are parsed as a fallback.
+    """
+    if skills is None:
+        return []
+    if isinstance(skills, list):
+        return skills
+    if isinstance(skills, str):
+        try:
+            parsed = ast.literal_eval(skills)
+            return list(parsed) if isinstance(parsed, (list, tuple)) else [str(parsed)]
+        except (ValueError, SyntaxError):
+            return [skills]
+    return [str(skills)]
+
+
+def stream_rows(conn, query: str, params: Optional[dict] = None,
+                chunk_size: int = CHUNK_SIZE) -> Iterator[List[tuple]]:
+    """Yield chunks of rows from a named (server-side) psycopg2 cursor"""
+    with conn.cursor(name=f"training_data_{uuid.uuid4().hex[:12]}") as cur:
+        cur.itersize = chunk_size
+        cur.execute(query, params)
+        while True:
+            rows = cur.fetchmany(chunk_size)
+            if not rows:
+                break
+            yield rows
+
+
+class TrainingSet:
+    """
+    Binary skill matrix and role labels, in MultiLabelBinarizer layout
+
+    Columns follow the sorted skill vocabulary, exactly as a fitted
+    MultiLabelBinarizer would produce them.
+    """
+
+    def __init__(self, X: sparse.csr_matrix, y: np.ndarray, skills: np.ndarray, skipped: int = 0,
+                 ids: Optional[np.ndarray] = None):
+        self.X = X
+        self.y = y
+        self.skills = skills
+        self.skipped = skipped
+        # Source row ids (e.g. resume ids), when the query selected them
+        self.ids = ids
+
+    @property
+    def n_samples(self) -> int:
+        return self.X.shape[0]
+
+    @property
+    def n_features(self) -> int:
+        return self.X.shape[1]
+
+    def binarizer(self) -> MultiLabelBinarizer:
+        """A fitted MultiLabelBinarizer for this vocabulary (used at prediction time)"""
+        mlb = MultiLabelBinarizer(classes=list(self.skills))
+        mlb.fit([])
+        return mlb
+
+    def role_counts(self) -> Dict[str, int]:
+        """Samples per role, most common first"""
+        roles, counts = np.unique(self.y, return_counts=True)
+        return {str(role): int(count) for role, count in sorted(zip(roles, counts), key=lambda item: -item[1])}
+
+    def reindex(self, skills: Sequence[str]) -> sparse.csr_matrix:
+        """The matrix with columns mapped into a sorted superset vocabulary"""
+        skills = np.asarray(skills, dtype=object)
+        positions = np.searchsorted(skills, self.skills)
+        if len(self.skills) and not (skills[np.minimum(positions, len(skills) - 1)] == self.skills).all():
+            raise ValueError("Target vocabulary does not contain every skill of the training set")
+        X = sparse.csr_matrix(
+            (self.X.data, positions[self.X.indices], self.X.indptr),
+            shape=(self.n_samples, len(skills)),
+        )
+        X.sort_indices()
+        return X
+
+
+class TrainingSetBuilder:
+    """
+    Accumulates (skills, role) rows into compact arrays, one chunk at a time
+
+    With with_ids=True rows are (id, skills, role) and the ids are kept.
+    """
+
+    def __init__(self, with_ids: bool = False):
+        self.with_ids = with_ids
+        self._ids: List[str] = []
+        self._skill_ids: Dict[str, int] = {}
+        self._role_ids: Dict[str, int] = {}
+        self._indices = array("i")
+        self._indptr = array("q", [0])
+        self._labels = array("i")
+        self.skipped = 0
+
+    def add_rows(self, rows: Iterable[Tuple]):
+        """Add (skills, role) rows (or (id, skills, role)); rows without skills are skipped"""
+        skill_ids = self._skill_ids
+        role_ids = self._role_ids
+        indices = self._indices
+        for row in rows:
+            raw_skills, role = row[-2:]
+            columns = {skill_ids.setdefault(skill, len(skill_ids)) for skill in parse_skills(raw_skills)}
+            if not columns:
+                self.skipped += 1
+                continue
+            if self.with_ids:
+                self._ids.append(str(row[0]))
+            indices.extend(columns)
+            self._indptr.append(len(indices))
+            self._labels.append(role_ids.setdefault(role, len(role_ids)))
+
+    def build(self) -> TrainingSet:
+        """CSR matrix with columns in sorted skill order, plus labels"""
+        names = np.array(list(self._skill_ids), dtype=object)
+        order = np.argsort(names, kind="stable") if len(names) else np.zeros(0, dtype=np.int64)
+        # First-seen IDs -> position in the sorted vocabulary
+        remap = np.empty(len(names), dtype=np.int32)
+        remap[order] = np.arange(len(names), dtype=np.int32)
+
+        indices = remap[np.frombuffer(self._indices, dtype=np.int32)] if len(self._indices) else np.zeros(0, dtype=np.int32)
+        indptr = np.frombuffer(self._indptr, dtype=np.int64)
+        X = sparse.csr_matrix(
+            (np.ones(len(indices), dtype=np.float64), indices, indptr),
+            shape=(len(indptr) - 1, len(names)),
+        )
+        X.sort_indices()
+
+        roles = np.array(list(self._role_ids), dtype=object)
+        y = roles[np.frombuffer(self._labels, dtype=np.int32)] if len(self._labels) else np.zeros(0, dtype=object)
+        ids = np.array(self._ids, dtype=object) if self.with_ids else None
+        return TrainingSet(X, y, names[order], self.skipped, ids)
+
+
+def load_training_set(conn, query: str = CONFIRMED_RESUMES_QUERY, params: Optional[dict] = None,
+                      chunk_size: int = CHUNK_SIZE, on_chunk: Optional[Callable[[int], None]] = None,
+                      with_ids: bool = False) -> TrainingSet:
+    """
+    Stream (skills, role) rows of a query into a TrainingSet
+
+    With with_ids=True the query selects (id, skills, role).
+    on_chunk(rows_read) is called after every chunk, e.g. to report progress.
+    """
+    builder = TrainingSetBuilder(with_ids)
+    rows_read = 0
+    for rows in stream_rows(conn, query, params, chunk_size):
+        builder.add_rows(rows)
+        rows_read += len(rows)
+        if on_chunk is not None:
+            on_chunk(rows_read)
+    return builder.build()
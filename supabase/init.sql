@@ -10,6 +10,27 @@ CREATE TABLE IF NOT EXISTS roles (
   updated_at TIMESTAMP DEFAULT now()
 );
 
+-- Create custom skills table (loaded into the skill extractor at startup and polled by every worker)
+CREATE TABLE IF NOT EXISTS custom_skills (
+  id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+  skill TEXT NOT NULL,
+  category VARCHAR(255) NOT NULL DEFAULT 'custom',
+  created_at TIMESTAMP DEFAULT now(),
+  UNIQUE (skill, category)
+);
+
+-- Create model versions table (the active row is the model every worker serves)
+CREATE TABLE IF NOT EXISTS model_versions (
+  version TEXT PRIMARY KEY,
+  is_active BOOLEAN NOT NULL DEFAULT FALSE,
+  metadata JSONB,
+  created_at TIMESTAMP DEFAULT now(),
+  activated_at TIMESTAMP
+);
+
+-- At most one active version; also serves the workers' polling query
+CREATE UNIQUE INDEX IF NOT EXISTS model_versions_active_idx ON model_versions (is_active) WHERE is_active;
+
 CREATE TABLE resumes (
   id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
   user_email TEXT,
@@ -17,10 +38,14 @@ CREATE TABLE resumes (
   extracted_skills TEXT[],
   predicted_role TEXT,
   confirmed_role TEXT,
+  confirmed_at TIMESTAMP,
   match_score FLOAT,
   created_at TIMESTAMP DEFAULT now()
 );
 
+-- Incremental retraining reads resumes confirmed after the model's watermark
+CREATE INDEX IF NOT EXISTS resumes_confirmed_at_idx ON resumes (confirmed_at) WHERE confirmed_role IS NOT NULL;
+
 -- Seed roles data
 INSERT INTO roles (name, description) VALUES 
 ('Full Stack Developer', 'Develops both frontend and backend applications'),